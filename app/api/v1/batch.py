@@ -15,7 +15,7 @@ from fastapi.responses import StreamingResponse
 
 from app.services.batch_service import process_batch_zip, list_zip_contents
 from app.schemas.batch import BatchOperation
-from app.utils.file_utils import FileValidationError
+from app.utils.file_utils import FileValidationError, iter_file
 
 
 router = APIRouter(prefix="/batch", tags=["Batch Operations"])
@@ -106,7 +106,7 @@ async def api_batch_process(
         filename = f"{base_name}_processed_{timestamp}.zip"
         
         return StreamingResponse(
-            result_zip,
+            iter_file(result_zip),
             media_type="application/zip",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
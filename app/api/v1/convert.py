@@ -6,7 +6,6 @@ No user data is written to disk (except temp files in tmpfs for LibreOffice).
 
 Reference: CONV-01 to CONV-11
 """
-from io import BytesIO
 from typing import Optional
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
@@ -17,14 +16,13 @@ from app.services.conversion_service import (
     pdf_to_office,
 )
 from app.services.web_conversion_service import (
-    html_to_pdf,
-    markdown_to_pdf,
+    html_to_pdf_async,
+    markdown_to_pdf_async,
     url_to_pdf,
 )
 from app.services.text_conversion_service import (
     text_to_pdf,
     rtf_to_pdf,
-    validate_rtf_content,
 )
 from app.utils.file_utils import (
     validate_pdf,
@@ -33,6 +31,7 @@ from app.utils.file_utils import (
     validate_pptx,
     validate_rtf,
     FileValidationError,
+    iter_file,
 )
 
 
@@ -64,7 +63,7 @@ async def api_word_to_pdf(
         filename = f"{base_name}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -99,7 +98,7 @@ async def api_excel_to_pdf(
         filename = f"{base_name}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -134,7 +133,7 @@ async def api_powerpoint_to_pdf(
         filename = f"{base_name}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -175,7 +174,7 @@ async def api_pdf_to_word(
         filename = f"{base_name}.docx"
         
         return StreamingResponse(
-            docx_bytes,
+            iter_file(docx_bytes),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -211,7 +210,7 @@ async def api_pdf_to_excel(
         filename = f"{base_name}.xlsx"
         
         return StreamingResponse(
-            xlsx_bytes,
+            iter_file(xlsx_bytes),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -247,7 +246,7 @@ async def api_pdf_to_powerpoint(
         filename = f"{base_name}.pptx"
         
         return StreamingResponse(
-            pptx_bytes,
+            iter_file(pptx_bytes),
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -281,10 +280,10 @@ async def api_html_to_pdf(
     """
     try:
         # Convert HTML to PDF
-        pdf_bytes = html_to_pdf(html, base_url)
+        pdf_bytes = await html_to_pdf_async(html, base_url)
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": 'attachment; filename="converted.pdf"'
@@ -311,10 +310,10 @@ async def api_markdown_to_pdf(
     """
     try:
         # Convert Markdown to PDF
-        pdf_bytes = markdown_to_pdf(markdown)
+        pdf_bytes = await markdown_to_pdf_async(markdown)
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": 'attachment; filename="converted.pdf"'
@@ -354,7 +353,7 @@ async def api_url_to_pdf(
         filename = f"{safe_domain}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -446,7 +445,7 @@ async def api_text_to_pdf(
         filename = f"{base_name}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -471,25 +470,17 @@ async def api_rtf_to_pdf(
     All processing uses in-memory streams with temp files only in tmpfs.
     """
     try:
-        # Read content
-        content = await file.read()
-        
-        # Validate RTF header
-        if not validate_rtf_content(content):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid RTF file. File does not have RTF header."
-            )
+        # Validate size and RTF header before LibreOffice is involved
+        rtf_bytes = await validate_rtf(file)
         
         # Convert to PDF
-        rtf_bytes = BytesIO(content)
         pdf_bytes = rtf_to_pdf(rtf_bytes)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
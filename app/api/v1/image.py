@@ -23,6 +23,7 @@ from app.utils.file_utils import (
     create_zip_archive,
     InvalidPageError,
     FileValidationError,
+    iter_file,
 )
 
 
@@ -97,7 +98,7 @@ async def api_pdf_to_images(
             media_type = media_types.get(ext, 'image/png')
             
             return StreamingResponse(
-                content,
+                iter_file(content),
                 media_type=media_type,
                 headers={
                     "Content-Disposition": f'attachment; filename="{filename}"'
@@ -109,7 +110,7 @@ async def api_pdf_to_images(
             base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
             
             return StreamingResponse(
-                zip_content,
+                iter_file(zip_content),
                 media_type="application/zip",
                 headers={
                     "Content-Disposition": f'attachment; filename="{base_name}_images.zip"'
@@ -185,7 +186,7 @@ async def api_images_to_pdf(
         filename = f"{base_name}_combined.pdf"
         
         return StreamingResponse(
-            pdf_bytes,
+            iter_file(pdf_bytes),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
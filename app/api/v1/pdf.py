@@ -42,6 +42,7 @@ from app.services.pdf_extract_service import (
     extract_images,
     extract_pages,
 )
+from app.core.workers import run_pdf_job
 from app.utils.file_utils import (
     validate_pdf,
     validate_image,
@@ -50,6 +51,7 @@ from app.utils.file_utils import (
     InvalidPageError,
     EmptyResultError,
     FileValidationError,
+    iter_file,
 )
 
 
@@ -82,14 +84,14 @@ async def api_merge_pdfs(
             pdf_buffers.append(pdf_bytes)
         
         # Merge PDFs
-        merged_pdf = merge_pdfs(pdf_buffers)
+        merged_pdf = await run_pdf_job(merge_pdfs, pdf_buffers)
         
         # Generate filename
         first_name = files[0].filename or "document"
         filename = generate_filename("merged", first_name)
         
         return StreamingResponse(
-            merged_pdf,
+            iter_file(merged_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -140,7 +142,8 @@ async def api_split_pdf(
                 raise HTTPException(status_code=400, detail="Invalid pages format. Must be JSON array.")
         
         # Split PDF
-        results = split_pdf(
+        results = await run_pdf_job(
+            split_pdf,
             pdf_bytes,
             mode=split_mode,
             start=start,
@@ -153,7 +156,7 @@ async def api_split_pdf(
             # Single file - return directly
             filename, content = results[0]
             return StreamingResponse(
-                content,
+                iter_file(content),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f'attachment; filename="{filename}"'
@@ -164,7 +167,7 @@ async def api_split_pdf(
             zip_content = create_zip_archive(results)
             base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
             return StreamingResponse(
-                zip_content,
+                iter_file(zip_content),
                 media_type="application/zip",
                 headers={
                     "Content-Disposition": f'attachment; filename="{base_name}_split.zip"'
@@ -205,13 +208,13 @@ async def api_rotate_pages(
                 raise HTTPException(status_code=400, detail="Invalid pages format. Must be 'all' or JSON array.")
         
         # Rotate pages
-        rotated_pdf = rotate_pages(pdf_bytes, pages_to_rotate, degrees)
+        rotated_pdf = await run_pdf_job(rotate_pages, pdf_bytes, pages_to_rotate, degrees)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_rotated.pdf"
         
         return StreamingResponse(
-            rotated_pdf,
+            iter_file(rotated_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -245,13 +248,13 @@ async def api_reorder_pages(
             raise HTTPException(status_code=400, detail="Invalid page_order format. Must be JSON array.")
         
         # Reorder pages
-        reordered_pdf = reorder_pages(pdf_bytes, order)
+        reordered_pdf = await run_pdf_job(reorder_pages, pdf_bytes, order)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_reordered.pdf"
         
         return StreamingResponse(
-            reordered_pdf,
+            iter_file(reordered_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -287,13 +290,13 @@ async def api_delete_pages(
             raise HTTPException(status_code=400, detail="Invalid pages format. Must be JSON array.")
         
         # Delete pages
-        modified_pdf = delete_pages(pdf_bytes, pages_to_delete)
+        modified_pdf = await run_pdf_job(delete_pages, pdf_bytes, pages_to_delete)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_modified.pdf"
         
         return StreamingResponse(
-            modified_pdf,
+            iter_file(modified_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -337,13 +340,13 @@ async def api_compress_pdf(
             )
         
         # Compress PDF
-        compressed_pdf = compress_pdf(pdf_bytes, quality_preset)
+        compressed_pdf = await run_pdf_job(compress_pdf, pdf_bytes, quality_preset)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_compressed.pdf"
         
         return StreamingResponse(
-            compressed_pdf,
+            iter_file(compressed_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -386,13 +389,13 @@ async def api_add_password(
                 raise HTTPException(status_code=400, detail="Invalid permissions format. Must be JSON array.")
         
         # Add password
-        encrypted_pdf = add_password(pdf_bytes, password, perms_list)
+        encrypted_pdf = await run_pdf_job(add_password, pdf_bytes, password, perms_list)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_protected.pdf"
         
         return StreamingResponse(
-            encrypted_pdf,
+            iter_file(encrypted_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -418,13 +421,13 @@ async def api_remove_password(
         pdf_bytes = await validate_pdf(file)
         
         # Remove password
-        decrypted_pdf = remove_password(pdf_bytes, password)
+        decrypted_pdf = await run_pdf_job(remove_password, pdf_bytes, password)
         
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         filename = f"{base_name}_decrypted.pdf"
         
         return StreamingResponse(
-            decrypted_pdf,
+            iter_file(decrypted_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -492,7 +495,7 @@ async def api_add_text_watermark(
         filename = f"{base_name}_watermarked.pdf"
         
         return StreamingResponse(
-            watermarked_pdf,
+            iter_file(watermarked_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -556,7 +559,7 @@ async def api_add_image_watermark(
         filename = f"{base_name}_watermarked.pdf"
         
         return StreamingResponse(
-            watermarked_pdf,
+            iter_file(watermarked_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -643,7 +646,7 @@ async def api_extract_images(
         base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
         
         return StreamingResponse(
-            zip_content,
+            iter_file(zip_content),
             media_type="application/zip",
             headers={
                 "Content-Disposition": f'attachment; filename="{base_name}_images.zip"'
@@ -681,7 +684,7 @@ async def api_extract_pages(
             # Single page - return directly
             filename, content = results[0]
             return StreamingResponse(
-                content,
+                iter_file(content),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f'attachment; filename="{filename}"'
@@ -693,7 +696,7 @@ async def api_extract_pages(
             base_name = file.filename.rsplit('.', 1)[0] if file.filename else "document"
             
             return StreamingResponse(
-                zip_content,
+                iter_file(zip_content),
                 media_type="application/zip",
                 headers={
                     "Content-Disposition": f'attachment; filename="{base_name}_pages.zip"'
@@ -749,7 +752,7 @@ async def api_crop_pages(
         filename = f"{base_name}_cropped.pdf"
         
         return StreamingResponse(
-            cropped_pdf,
+            iter_file(cropped_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -805,7 +808,7 @@ async def api_scale_pages(
         filename = f"{base_name}_scaled.pdf"
         
         return StreamingResponse(
-            scaled_pdf,
+            iter_file(scaled_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -862,7 +865,7 @@ async def api_resize_pages(
         filename = f"{base_name}_resized.pdf"
         
         return StreamingResponse(
-            resized_pdf,
+            iter_file(resized_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -935,7 +938,7 @@ async def api_add_page_numbers(
         filename = f"{base_name}_numbered.pdf"
         
         return StreamingResponse(
-            numbered_pdf,
+            iter_file(numbered_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -971,7 +974,7 @@ async def api_flatten_annotations(
         filename = f"{base_name}_flattened.pdf"
         
         return StreamingResponse(
-            flattened_pdf,
+            iter_file(flattened_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -1020,7 +1023,7 @@ async def api_remove_metadata(
         filename = f"{base_name}_anonymized.pdf"
         
         return StreamingResponse(
-            anonymized_pdf,
+            iter_file(anonymized_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -1078,7 +1081,7 @@ async def api_compare_pdfs(
         filename = f"{name1}_vs_{name2}_comparison.pdf"
         
         return StreamingResponse(
-            comparison_pdf,
+            iter_file(comparison_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -1152,7 +1155,7 @@ async def api_redact_text(
         filename = f"{base_name}_redacted.pdf"
         
         return StreamingResponse(
-            redacted_pdf,
+            iter_file(redacted_pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
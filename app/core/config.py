@@ -15,10 +15,23 @@ class Settings(BaseSettings):
     # File handling
     MAX_FILE_SIZE_MB: int = 100
     UPLOAD_DIR: str = "/tmp/uploads"
+    SPOOL_DIR: str = "/tmp"
+    SPOOL_MAX_SIZE_MB: int = 8
     
     # Timeouts
     REQUEST_TIMEOUT_SECONDS: int = 30
     
+    # Pack the xref and small objects into object streams (PDF 1.5) on save
+    COMPRESS_XREF: bool = True
+    
+    # Worker processes for CPU-bound PDF jobs (0 runs them in a thread)
+    PDF_WORKER_PROCESSES: int = 2
+    
+    # URL-to-PDF result cache (RAM only, off by default for zero-trace)
+    URL_CACHE_ENABLED: bool = False
+    URL_CACHE_MAX_ENTRIES: int = 128
+    URL_CACHE_TTL_SECONDS: int = 300
+    
     @property
     def MAX_UPLOAD_SIZE_BYTES(self) -> int:
         """Convert MB to bytes for upload size limit."""
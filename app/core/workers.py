@@ -0,0 +1,97 @@
+"""
+Worker process pool for CPU-bound PDF operations.
+
+pikepdf and PyMuPDF hold the GIL for most of their work, so running them
+inline blocks the event loop and threads can't run them in parallel.
+Jobs go to a pool of forkserver processes instead: workers start from a
+small server process rather than a copy of the application's heap, and
+each job's document state dies with the job's result.
+
+When the pool isn't running (PDF_WORKER_PROCESSES=0, or outside the
+application lifespan such as in tests) jobs run in a thread instead.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("notracepdf")
+
+# Modules imported once by the forkserver so workers start warm
+WORKER_PRELOAD = [
+    'app.services.pdf_service',
+    'app.services.pdf_security_service',
+]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_worker_pool() -> None:
+    """Start the worker process pool if configured and not yet running."""
+    global _pool
+    if _pool is not None or settings.PDF_WORKER_PROCESSES <= 0:
+        return
+
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(WORKER_PRELOAD)
+    _pool = ProcessPoolExecutor(
+        max_workers=settings.PDF_WORKER_PROCESSES,
+        mp_context=context,
+    )
+    logger.info('{"event": "worker_pool_started", "workers": %d}', settings.PDF_WORKER_PROCESSES)
+
+
+def stop_worker_pool() -> None:
+    """Stop the worker process pool, dropping any queued jobs."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _detach(result: Any) -> Any:
+    """Read a job's output file(s) into bytes so they can leave the worker."""
+    if isinstance(result, list):
+        return [(name, _detach(content)) for name, content in result]
+    with result:
+        return result.read()
+
+
+def _attach(result: Any) -> Any:
+    """Wrap bytes returned by a worker back into BytesIO objects."""
+    if isinstance(result, list):
+        return [(name, _attach(content)) for name, content in result]
+    return BytesIO(result)
+
+
+def _run_job(func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Worker entry point: run the service function and detach its output."""
+    return _detach(func(*args, **kwargs))
+
+
+async def run_pdf_job(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a PDF service function off the event loop.
+
+    The function must be importable at module level and return a file
+    object, or a list of (filename, file) tuples; arguments and errors
+    must be picklable.
+
+    Args:
+        func: Service function to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Any: The function's result, with files as BytesIO when run in the pool
+    """
+    if _pool is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_pool, _run_job, func, args, kwargs)
+    return _attach(result)
@@ -16,6 +16,12 @@ from fastapi.responses import FileResponse
 
 from app.core.config import settings
 from app.core.cleanup import register_cleanup_handlers
+from app.core.workers import start_worker_pool, stop_worker_pool
+from app.services.text_conversion_service import (
+    start_office_listener,
+    stop_office_listener,
+)
+from app.services.web_conversion_service import close_http_client
 from app.middleware.privacy_logging import PrivacyLoggingMiddleware
 from app.middleware.cache_headers import CacheHeadersMiddleware
 from app.api.v1 import api_router
@@ -30,8 +36,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan handler for startup and shutdown events."""
     # Startup
     register_cleanup_handlers()
+    start_office_listener()
+    start_worker_pool()
     yield
     # Shutdown - cleanup is handled by signal handlers
+    stop_worker_pool()
+    stop_office_listener()
+    await close_http_client()
 
 
 # Create FastAPI application
@@ -18,6 +18,7 @@ from app.services.pdf_service import split_pdf
 from app.services.pdf_security_service import add_password
 from app.schemas.batch import BatchOperation, BatchOptions, BatchResultFile
 from app.schemas.pdf import QualityPreset, SplitMode
+from app.utils.file_utils import create_zip_archive
 
 logger = logging.getLogger(__name__)
 
@@ -81,7 +82,7 @@ def process_batch_zip(
         raise ValueError("No PDF files found or processed in ZIP")
     
     # Create result ZIP
-    return _create_result_zip(results)
+    return create_zip_archive(results)
 
 
 def _process_single_pdf(
@@ -151,27 +152,6 @@ def _process_single_pdf(
         raise
 
 
-def _create_result_zip(files: List[Tuple[str, BytesIO]]) -> BytesIO:
-    """
-    Create a ZIP archive from processed files.
-    
-    Args:
-        files: List of (filename, BytesIO) tuples
-        
-    Returns:
-        BytesIO: ZIP file
-    """
-    output = BytesIO()
-    
-    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for filename, content in files:
-            content.seek(0)
-            zf.writestr(filename, content.read())
-    
-    output.seek(0)
-    return output
-
-
 def list_zip_contents(zip_bytes: BytesIO) -> List[str]:
     """
     List contents of a ZIP file.
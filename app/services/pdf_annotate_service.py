@@ -12,7 +12,8 @@ from typing import List, Optional
 from enum import Enum
 
 import fitz  # PyMuPDF
-import pikepdf
+
+from app.utils.file_utils import open_pdf
 
 
 class PageNumberPosition(str, Enum):
@@ -264,7 +265,7 @@ def remove_metadata(
     file.seek(0)
     output = BytesIO()
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         # Map field names to PDF dictionary keys
         field_map = {
             "title": "/Title",
@@ -311,7 +312,7 @@ def get_metadata(file: BytesIO) -> dict:
     file.seek(0)
     output = {}
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         if pdf.docinfo:
             for key, value in pdf.docinfo.items():
                 # Convert pikepdf objects to strings
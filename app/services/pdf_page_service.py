@@ -15,6 +15,7 @@ import pikepdf
 
 from app.utils.file_utils import (
     InvalidPageError,
+    open_pdf,
     validate_page_numbers,
 )
 
@@ -50,7 +51,7 @@ def crop_pages(
     file.seek(0)
     output = BytesIO()
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         total_pages = len(pdf.pages)
         
         # Determine which pages to crop
@@ -126,7 +127,7 @@ def scale_pages(
     file.seek(0)
     output = BytesIO()
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         total_pages = len(pdf.pages)
         
         # Determine which pages to scale
@@ -231,7 +232,7 @@ def resize_pages(
     file.seek(0)
     output = BytesIO()
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         total_pages = len(pdf.pages)
         
         # Determine which pages to resize
@@ -266,7 +267,7 @@ def get_page_dimensions(file: BytesIO) -> List[dict]:
     """
     file.seek(0)
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         dimensions = []
         
         for i, page in enumerate(pdf.pages):
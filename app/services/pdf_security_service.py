@@ -17,7 +17,8 @@ import zlib
 from PIL import Image
 
 from app.schemas.pdf import QualityPreset
-from app.utils.file_utils import FileValidationError
+from app.services.pdf_service import OBJECT_STREAM_MODE
+from app.utils.file_utils import FileValidationError, open_pdf
 
 
 # Permission field mapping for pikepdf (v9+ API)
@@ -55,21 +56,25 @@ def build_permissions(allowed: List[str]) -> pikepdf.Permissions:
 # Quality preset configurations
 # Note: Preset names indicate compression LEVEL, not quality level
 # HIGH = maximum compression (smallest file), LOW = minimal compression (preserve quality)
+# png_compress_level is the zlib level for re-encoded transparent images
 QUALITY_SETTINGS = {
     QualityPreset.HIGH: {
         "dpi": 72,
         "image_quality": 60,
         "downsample": True,
+        "png_compress_level": 9,
     },
     QualityPreset.MEDIUM: {
         "dpi": 150,
         "image_quality": 75,
         "downsample": True,
+        "png_compress_level": 6,
     },
     QualityPreset.LOW: {
         "dpi": 300,
         "image_quality": 90,
         "downsample": False,
+        "png_compress_level": 1,
     },
 }
 
@@ -102,6 +107,7 @@ def compress_pdf(
         dpi = settings["dpi"]
         img_quality = settings["image_quality"]
         downsample = settings["downsample"]
+        png_compress_level = settings["png_compress_level"]
         
         # Calculate dimensions for target DPI
         # Standard PDF is 72 DPI, so scale factor is dpi/72
@@ -140,8 +146,9 @@ def compress_pdf(
                     output_buffer = BytesIO()
                     
                     if pil_image.mode == "RGBA":
-                        # For images with transparency, use PNG with optimization
-                        pil_image.save(output_buffer, format="PNG", optimize=True)
+                        # For images with transparency, use PNG at the preset's
+                        # zlib level instead of optimize=True's extra encoder search
+                        pil_image.save(output_buffer, format="PNG", compress_level=png_compress_level)
                     elif pil_image.mode == "CMYK":
                         # For CMYK images (common in PDFs), convert to RGB
                         pil_image = pil_image.convert("RGB")
@@ -191,7 +198,7 @@ def add_password(
     file.seek(0)
     output = BytesIO()
     
-    with pikepdf.Pdf.open(file) as pdf:
+    with open_pdf(file) as pdf:
         perms = build_permissions(permissions) if permissions else pikepdf.Permissions(
             accessibility=True,
             extract=False,
@@ -210,7 +217,7 @@ def add_password(
             R=6,
         )
         
-        pdf.save(output, encryption=encryption)
+        pdf.save(output, encryption=encryption, object_stream_mode=OBJECT_STREAM_MODE)
     
     output.seek(0)
     return output
@@ -225,8 +232,10 @@ def remove_password(
     output = BytesIO()
     
     try:
-        with pikepdf.Pdf.open(file, password=password) as pdf:
-            pdf.save(output)
+        with open_pdf(file, password=password) as pdf:
+            # qpdf only decrypts here: compressed streams are copied through
+            # without being inflated and re-deflated
+            pdf.save(output, encryption=False, object_stream_mode=OBJECT_STREAM_MODE)
     except pikepdf.PasswordError:
         raise FileValidationError(
             status_code=401,
@@ -252,7 +261,7 @@ def set_permissions(
     output = BytesIO()
     
     try:
-        with pikepdf.Pdf.open(file, password=password) as pdf:
+        with open_pdf(file, password=password) as pdf:
             perms = build_permissions(permissions)
             
             encryption = pikepdf.Encryption(
@@ -262,7 +271,7 @@ def set_permissions(
                 R=6,
             )
             
-            pdf.save(output, encryption=encryption)
+            pdf.save(output, encryption=encryption, object_stream_mode=OBJECT_STREAM_MODE)
     except pikepdf.PasswordError:
         raise FileValidationError(
             status_code=401,
@@ -277,7 +286,7 @@ def is_encrypted(file: BytesIO) -> bool:
     """Check if PDF is password protected."""
     file.seek(0)
     try:
-        with pikepdf.Pdf.open(file) as pdf:
+        with open_pdf(file) as pdf:
             return pdf.is_encrypted
     except pikepdf.PasswordError:
         return True
@@ -8,7 +8,7 @@ Reference: PDF-12, PDF-13
 """
 import fitz  # PyMuPDF
 from io import BytesIO
-from typing import List, Tuple
+from typing import BinaryIO, List, Tuple
 from PIL import Image
 
 from app.schemas.pdf import (
@@ -17,7 +17,7 @@ from app.schemas.pdf import (
     TextWatermarkRequest,
     ImageWatermarkRequest,
 )
-from app.utils.file_utils import validate_page_numbers
+from app.utils.file_utils import create_output_buffer, validate_page_numbers
 
 
 def get_page_dimensions(page: fitz.Page) -> Tuple[float, float]:
@@ -79,14 +79,32 @@ def _parse_color(color_str: str) -> Tuple[float, float, float]:
     return (0.5, 0.5, 0.5)  # Default gray
 
 
+def _fits_base14(text: str) -> bool:
+    """Whether text can be set in non-embedded Base-14 Helvetica (WinAnsiEncoding)."""
+    try:
+        text.encode('cp1252')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _select_text_font(text: str) -> fitz.Font:
+    """Pick a builtin font that has glyphs for every character in text."""
+    font = fitz.Font("helv")
+    if all(font.has_glyph(ord(char)) for char in text if not char.isspace()):
+        return font
+    # Droid Sans Fallback ships with MuPDF and covers CJK scripts
+    return fitz.Font("cjk")
+
+
 def add_text_watermark(
     file: BytesIO,
     request: TextWatermarkRequest
-) -> BytesIO:
+) -> BinaryIO:
     """Add text watermark to PDF using PyMuPDF."""
     file.seek(0)
     pdf = fitz.open(stream=file.read(), filetype="pdf")
-    output = BytesIO()
+    output = create_output_buffer()
     
     try:
         total_pages = len(pdf)
@@ -102,51 +120,74 @@ def add_text_watermark(
             pages_to_process = [p - 1 for p in request.pages]
             validate_page_numbers(request.pages, total_pages)
         
-        # Parse color
+        # Resolve everything that does not depend on the page once, so the
+        # font and opacity state are shared by every watermarked page.
+        # Text that Base-14 Helvetica can encode references it without
+        # embedding (one shared font resource, no font program); anything
+        # else goes through a TextWriter, which emits glyph ids as hex
+        # strings so no content-stream escaping is needed, and embeds a
+        # font that is subset afterwards.
         color = _parse_color(request.color)
+        base14 = _fits_base14(request.text)
+        font = fitz.Font("helv") if base14 else _select_text_font(request.text)
+        text_width = font.text_length(request.text, fontsize=request.font_size)
+        text_height = request.font_size
+        
+        # The text position only depends on the page size, so compute it
+        # (and lay out the TextWriter, if used) once per size
+        points = {}
+        writers = {}
         
         for page_idx in pages_to_process:
             page = pdf[page_idx]
-            page_width, page_height = get_page_dimensions(page)
+            page_size = get_page_dimensions(page)
+            text_point = points.get(page_size)
             
-            # Calculate text dimensions (rough estimate)
-            text_width = len(request.text) * request.font_size * 0.6
-            text_height = request.font_size
+            if text_point is None:
+                page_width, page_height = page_size
+                x, y, angle = calculate_position(
+                    request.position,
+                    page_width,
+                    page_height,
+                    text_width,
+                    text_height
+                )
+                
+                # Calculate text point
+                if request.position == WatermarkPosition.DIAGONAL:
+                    # Center point for diagonal
+                    text_point = fitz.Point(page_width / 2, page_height / 2)
+                else:
+                    # Standard position
+                    text_point = fitz.Point(x, page_height - y - text_height)
+                points[page_size] = text_point
             
-            x, y, angle = calculate_position(
-                request.position,
-                page_width,
-                page_height,
-                text_width,
-                text_height
-            )
+            if base14:
+                page.insert_text(
+                    text_point,
+                    request.text,
+                    fontname="helv",
+                    fontsize=request.font_size,
+                    color=color,
+                    fill_opacity=request.opacity,
+                )
+                continue
             
-            # Calculate text point
-            if request.position == WatermarkPosition.DIAGONAL:
-                # Center point for diagonal
-                text_point = fitz.Point(page_width / 2, page_height / 2)
-            else:
-                # Standard position
-                text_point = fitz.Point(x, page_height - y - text_height)
-            
-            # Insert text (PyMuPDF doesn't support rotate parameter directly)
-            # For diagonal, we'll use a different approach
-            page.insert_text(
-                text_point,
-                request.text,
-                fontsize=request.font_size,
-                color=color,
-                render_mode=0
-            )
-            
-            # Apply opacity using transparency
-            if request.opacity < 1.0:
-                # Create a transparent overlay by adjusting color alpha
-                # Note: PyMuPDF doesn't support direct opacity, so we blend
-                pass
+            writer = writers.get(page_size)
+            if writer is None:
+                writer = fitz.TextWriter(page.rect)
+                writer.append(text_point, request.text, font=font, fontsize=request.font_size)
+                writers[page_size] = writer
+            writer.write_text(page, color=color, opacity=request.opacity)
         
-        # Save with garbage collection
-        pdf.save(output, garbage=4, deflate=True)
+        if not base14:
+            # Embedded fonts are whole font programs (the CJK fallback is
+            # several MB); keep only the glyphs used
+            pdf.subset_fonts()
+        
+        # Save with garbage collection; PyMuPDF refuses to save into a
+        # nameless file object, so write the serialized bytes instead
+        output.write(pdf.tobytes(garbage=4, deflate=True))
         output.seek(0)
         return output
         
@@ -158,13 +199,13 @@ def add_image_watermark(
     file: BytesIO,
     image_bytes: BytesIO,
     request: ImageWatermarkRequest
-) -> BytesIO:
+) -> BinaryIO:
     """Add image watermark to PDF using PyMuPDF."""
     file.seek(0)
     image_bytes.seek(0)
     
     pdf = fitz.open(stream=file.read(), filetype="pdf")
-    output = BytesIO()
+    output = create_output_buffer()
     
     try:
         total_pages = len(pdf)
@@ -180,34 +221,21 @@ def add_image_watermark(
             pages_to_process = [p - 1 for p in request.pages]
             validate_page_numbers(request.pages, total_pages)
         
-        # Process image
+        # Process image (PIL only parses the header here)
         image_bytes.seek(0)
         img = Image.open(image_bytes)
         img_width, img_height = img.size
         
-        # Convert to RGB/RGBA for PDF compatibility
-        if img.mode == 'P':
-            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
-        elif img.mode not in ('RGB', 'RGBA'):
-            img = img.convert('RGB')
-        
-        for page_idx in pages_to_process:
-            page = pdf[page_idx]
-            page_width, page_height = get_page_dimensions(page)
-            
-            # Calculate scaled dimensions
-            scale = request.scale
-            scaled_width = page_width * scale
-            scaled_height = (img_height / img_width) * scaled_width
-            
-            # Calculate position
-            x, y, _ = calculate_position(
-                request.position,
-                page_width,
-                page_height,
-                scaled_width,
-                scaled_height
-            )
+        if img.format in ('JPEG', 'PNG'):
+            # MuPDF embeds these natively (JPEG data is copied as-is into a
+            # DCTDecode stream), so skip the decode/re-encode round-trip
+            image_data = image_bytes.getvalue()
+        else:
+            # Convert to RGB/RGBA for PDF compatibility
+            if img.mode == 'P':
+                img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+            elif img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGB')
             
             # Convert PIL image to bytes
             img_byte_arr = BytesIO()
@@ -215,16 +243,48 @@ def add_image_watermark(
                 img.save(img_byte_arr, format='PNG')
             else:
                 img.save(img_byte_arr, format='JPEG', quality=95)
-            img_byte_arr.seek(0)
+            image_data = img_byte_arr.getvalue()
+        image_xref = 0
+        
+        # Placement per page size; most documents have a single size
+        image_rects = {}
+        
+        for page_idx in pages_to_process:
+            page = pdf[page_idx]
+            page_size = get_page_dimensions(page)
+            rect = image_rects.get(page_size)
             
-            # Define rectangle for image placement
-            rect = fitz.Rect(x, y, x + scaled_width, y + scaled_height)
+            if rect is None:
+                page_width, page_height = page_size
+                
+                # Calculate scaled dimensions
+                scale = request.scale
+                scaled_width = page_width * scale
+                scaled_height = (img_height / img_width) * scaled_width
+                
+                # Calculate position
+                x, y, _ = calculate_position(
+                    request.position,
+                    page_width,
+                    page_height,
+                    scaled_width,
+                    scaled_height
+                )
+                
+                # Define rectangle for image placement
+                rect = fitz.Rect(x, y, x + scaled_width, y + scaled_height)
+                image_rects[page_size] = rect
             
-            # Insert image
-            page.insert_image(rect, stream=img_byte_arr.read())
+            # Embed the image once, then reference the same XObject
+            # from every other page instead of re-embedding it
+            if image_xref:
+                page.insert_image(rect, xref=image_xref)
+            else:
+                image_xref = page.insert_image(rect, stream=image_data)
         
-        # Save with garbage collection
-        pdf.save(output, garbage=4, deflate=True)
+        # Save with garbage collection; PyMuPDF refuses to save into a
+        # nameless file object, so write the serialized bytes instead
+        output.write(pdf.tobytes(garbage=4, deflate=True))
         output.seek(0)
         return output
         
@@ -9,11 +9,15 @@ All conversions maintain zero-trace in-memory processing.
 Reference: CONV-10, CONV-11
 Constraint: All operations use BytesIO or tmpfs temp files (ARCH-01, ARCH-03)
 """
+import os
+import shutil
+import signal
+import socket
 import subprocess
 import tempfile
-import os
+import time
 from io import BytesIO
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import fitz  # PyMuPDF
 
@@ -23,10 +27,152 @@ DEFAULT_PAGE_SIZE = (595, 842)  # A4 in points
 DEFAULT_MARGIN = 72  # 1 inch
 DEFAULT_FONT_SIZE = 12
 DEFAULT_FONT_FAMILY = "helv"  # Helvetica
+LINE_HEIGHT_FACTOR = 1.5
+
+# Short font names accepted by the API mapped to MuPDF Base-14 names
+BASE14_FONT_NAMES = {
+    "helv": "helv",
+    "cour": "cour",
+    "tim": "tiro",
+}
 
 # LibreOffice conversion timeout (seconds)
 LIBREOFFICE_TIMEOUT = 60
 
+# Interface the LibreOffice listener binds to; each worker picks its own
+# free port on it, so gunicorn workers never share (or stop) a listener
+UNOCONV_HOST = '127.0.0.1'
+
+# Seconds a stopping listener gets to exit after SIGTERM before SIGKILL
+LISTENER_STOP_TIMEOUT = 10
+
+# Listener process owned by this worker, its port and its LibreOffice
+# profile directory (None when not started)
+_office_listener: Optional[subprocess.Popen] = None
+_office_port: Optional[int] = None
+_office_profile: Optional[str] = None
+
+
+def _free_port() -> int:
+    """Ask the kernel for a currently unused loopback port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((UNOCONV_HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _process_group_alive(pgid: int) -> bool:
+    """
+    Whether a running process is left in the given process group.
+    
+    Killed members reparented to init stay in the group as zombies until
+    reaped, so /proc is checked to skip them where it's available.
+    """
+    try:
+        pids = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except FileNotFoundError:
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+    
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as stat:
+                # Fields after the ")" closing the command name: state, ppid, pgrp
+                state, _, pgrp = stat.read().rsplit(')', 1)[1].split()[:3]
+        except (FileNotFoundError, ProcessLookupError, IndexError, ValueError):
+            continue
+        if int(pgrp) == pgid and state != 'Z':
+            return True
+    return False
+
+
+def _kill_process_group(proc: subprocess.Popen) -> None:
+    """
+    Stop a listener together with the soffice it started.
+    
+    unoconv runs soffice as a blocking child, so terminating only the
+    wrapper would orphan soffice. The listener leads its own session, so
+    signalling its process group reaches both.
+    """
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    
+    deadline = time.monotonic() + LISTENER_STOP_TIMEOUT
+    try:
+        proc.wait(timeout=LISTENER_STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        pass
+    while _process_group_alive(proc.pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    
+    if _process_group_alive(proc.pid):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    proc.wait()
+
+
+def start_office_listener() -> None:
+    """
+    Start a persistent headless LibreOffice for RTF conversions.
+    
+    Keeps LibreOffice initialised between requests so rtf_to_pdf can skip
+    the 1-3 s cold start. Every worker runs its own listener on its own
+    port with its own profile directory; with a shared profile a second
+    soffice would hand off to the first instance and exit. Does nothing
+    while this worker's listener is still running; a listener that has
+    exited is cleaned up and replaced. If unoconv is missing, conversions
+    fall back to a one-shot LibreOffice process.
+    """
+    global _office_listener, _office_port, _office_profile
+    
+    if _office_listener is not None:
+        if _office_listener.poll() is None:
+            return
+        # The wrapper exited, but its soffice or profile may not have
+        stop_office_listener()
+    
+    port = _free_port()
+    profile = tempfile.mkdtemp(prefix='lo-listener-', dir='/tmp')
+    try:
+        _office_listener = subprocess.Popen(
+            [
+                'unoconv', '--listener',
+                '--server', UNOCONV_HOST,
+                '--port', str(port),
+                f'--user-profile={profile}',
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd='/tmp',
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        shutil.rmtree(profile, ignore_errors=True)
+        return
+    _office_port = port
+    _office_profile = profile
+
+
+def stop_office_listener() -> None:
+    """Stop the LibreOffice listener started by this worker and remove its profile."""
+    global _office_listener, _office_port, _office_profile
+    
+    if _office_listener is None:
+        return
+    
+    _kill_process_group(_office_listener)
+    if _office_profile is not None:
+        shutil.rmtree(_office_profile, ignore_errors=True)
+    _office_listener = None
+    _office_port = None
+    _office_profile = None
+
 
 def text_to_pdf(
     text_content: str,
@@ -53,89 +199,33 @@ def text_to_pdf(
     output = BytesIO()
     doc = fitz.open()
     
-    # Calculate text area dimensions
+    # Resolve the font once; every page shares it and line widths come
+    # from its real glyph metrics instead of a per-character estimate
+    font = fitz.Font(BASE14_FONT_NAMES.get(font_family, font_family))
     text_width = page_size[0] - 2 * margin
-    text_height = page_size[1] - 2 * margin
+    line_height = font_size * LINE_HEIGHT_FACTOR
+    lines_per_page = max(1, int((page_size[1] - 2 * margin) // line_height))
     
-    # Line height based on font size
-    line_height = font_size * 1.5
+    lines = _wrap_lines(text_content, font, font_size, text_width)
     
-    # Split content into lines
-    lines = text_content.split('\n')
-    
-    # Track position and page
-    y_position = margin
-    current_page = None
-    
-    for line in lines:
-        # Check if we need a new page
-        if current_page is None or y_position > (page_size[1] - margin - line_height):
-            current_page = doc.new_page(
-                width=page_size[0],
-                height=page_size[1]
-            )
-            y_position = margin
+    # One TextWriter per page: lines are appended in memory and the page
+    # content stream is written once, instead of one insert_text() per line
+    for first in range(0, max(len(lines), 1), lines_per_page):
+        page = doc.new_page(width=page_size[0], height=page_size[1])
+        writer = fitz.TextWriter(page.rect)
+        y_position = margin + font_size  # Baseline of the first line
         
-        # Handle empty lines
-        if not line:
+        for line in lines[first:first + lines_per_page]:
+            if line:
+                writer.append(
+                    (margin, y_position),
+                    line,
+                    font=font,
+                    fontsize=font_size
+                )
             y_position += line_height
-            continue
         
-        # Calculate available width for this line
-        # Use text insertion with wrapping
-        text_rect = fitz.Rect(
-            margin,
-            y_position,
-            page_size[0] - margin,
-            y_position + line_height * 5  # Allow for wrapped text
-        )
-        
-        # Insert text with wrapping
-        # For long lines, we need to handle wrapping manually
-        remaining_text = line
-        while remaining_text:
-            # Check if we need a new page
-            if y_position > (page_size[1] - margin - line_height):
-                current_page = doc.new_page(
-                    width=page_size[0],
-                    height=page_size[1]
-                )
-                y_position = margin
-            
-            # Calculate how many characters fit
-            char_width = font_size * 0.5  # Approximate
-            max_chars = int(text_width / char_width)
-            
-            if len(remaining_text) <= max_chars:
-                # Whole line fits
-                current_page.insert_text(
-                    (margin, y_position + font_size),  # Baseline position
-                    remaining_text,
-                    fontsize=font_size,
-                    fontname=font_family,
-                    color=(0, 0, 0)  # Black
-                )
-                y_position += line_height
-                remaining_text = ""
-            else:
-                # Need to wrap - find a good break point
-                break_point = max_chars
-                # Try to break at a space
-                space_pos = remaining_text[:max_chars].rfind(' ')
-                if space_pos > max_chars // 2:
-                    break_point = space_pos + 1
-                
-                current_line = remaining_text[:break_point].rstrip()
-                remaining_text = remaining_text[break_point:].lstrip()
-                
-                current_page.insert_text(
-                    (margin, y_position + font_size),
-                    current_line,
-                    fontsize=font_size,
-                    fontname=font_family,
-                    color=(0, 0, 0)
-                )
-                y_position += line_height
+        writer.write_text(page, color=(0, 0, 0))  # Black
     
     # Save PDF
     doc.save(output)
@@ -145,12 +235,79 @@ def text_to_pdf(
     return output
 
 
+def _wrap_lines(
+    text_content: str,
+    font: fitz.Font,
+    font_size: float,
+    max_width: float
+) -> List[str]:
+    """
+    Greedy word wrap of text into lines that fit max_width.
+    
+    Word widths are measured once per distinct word, which keeps wrapping
+    linear in the text length (prose reuses a small vocabulary).
+    
+    Args:
+        text_content: Text to wrap (newlines start a new line)
+        font: Font used for measuring
+        font_size: Font size in points
+        max_width: Available line width in points
+        
+    Returns:
+        List of lines; empty strings are blank lines
+    """
+    widths = {}
+    
+    def measure(word: str) -> float:
+        width = widths.get(word)
+        if width is None:
+            width = widths[word] = font.text_length(word, fontsize=font_size)
+        return width
+    
+    space_width = measure(" ")
+    lines = []
+    
+    for paragraph in text_content.split('\n'):
+        current = []
+        current_width = 0.0
+        
+        for word in paragraph.split(' '):
+            word_width = measure(word)
+            
+            # Break words that are wider than a full line
+            while word_width > max_width and len(word) > 1:
+                if current:
+                    lines.append(' '.join(current))
+                    current, current_width = [], 0.0
+                cut, cut_width = 1, measure(word[0])
+                while cut < len(word) and cut_width + measure(word[cut]) <= max_width:
+                    cut_width += measure(word[cut])
+                    cut += 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width -= cut_width
+            
+            if current and current_width + space_width + word_width > max_width:
+                lines.append(' '.join(current))
+                current, current_width = [word], word_width
+            elif current:
+                current.append(word)
+                current_width += space_width + word_width
+            else:
+                current, current_width = [word], word_width
+        
+        lines.append(' '.join(current))
+    
+    return lines
+
+
 def rtf_to_pdf(rtf_content: BytesIO) -> BytesIO:
     """
     Convert RTF document to PDF using LibreOffice headless.
     
-    RTF files are converted via LibreOffice Writer.
-    Temp files are created in /tmp (tmpfs) and cleaned up.
+    RTF files are converted via LibreOffice Writer, through the persistent
+    listener when one is running. The one-shot fallback works in a temp
+    directory in /tmp (tmpfs) that is removed afterwards.
     
     Args:
         rtf_content: RTF file as BytesIO
@@ -159,41 +316,54 @@ def rtf_to_pdf(rtf_content: BytesIO) -> BytesIO:
         BytesIO: PDF document
         
     Raises:
+        ValueError: If the content is not RTF
         RuntimeError: If LibreOffice conversion fails
         TimeoutError: If conversion times out
     """
     rtf_content.seek(0)
+    rtf_data = rtf_content.read()
     
-    # Create temp file for RTF input
-    with tempfile.NamedTemporaryFile(
-        suffix='.rtf',
-        dir='/tmp',
-        delete=False
-    ) as tmp_in:
-        tmp_in.write(rtf_content.read())
-        tmp_in_path = tmp_in.name
+    # Reject non-RTF input before paying for a LibreOffice round-trip
+    if not validate_rtf_content(rtf_data):
+        raise ValueError("Not an RTF file")
     
-    try:
-        # Run LibreOffice headless conversion
-        result = subprocess.run([
-            'libreoffice',
-            '--headless',
-            '--nofilter',
-            '--accept=none',
-            '--convert-to', 'pdf',
-            '--outdir', '/tmp',
-            tmp_in_path
-        ], timeout=LIBREOFFICE_TIMEOUT, capture_output=True, text=True)
+    # Prefer the warm listener; fall back to a one-shot LibreOffice
+    pdf_data = _convert_with_listener(rtf_data)
+    if pdf_data is not None:
+        return BytesIO(pdf_data)
+    
+    # Input, output and the LibreOffice profile share one tmpfs directory,
+    # so the whole conversion is cleaned up in a single step
+    with tempfile.TemporaryDirectory(prefix='lo-rtf-', dir='/tmp') as work_dir:
+        rtf_path = os.path.join(work_dir, 'input.rtf')
+        pdf_path = os.path.join(work_dir, 'input.pdf')
+        
+        with open(rtf_path, 'wb') as f:
+            f.write(rtf_data)
+        
+        try:
+            # Run LibreOffice headless conversion with a private profile
+            # so concurrent conversions don't serialize on its lock
+            result = subprocess.run([
+                'libreoffice',
+                '--headless',
+                '--nofilter',
+                '--accept=none',
+                '--convert-to', 'pdf',
+                '--outdir', work_dir,
+                f'-env:UserInstallation=file://{work_dir}/profile',
+                rtf_path
+            ], timeout=LIBREOFFICE_TIMEOUT, capture_output=True, text=True)
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(
+                f"LibreOffice conversion timed out after {LIBREOFFICE_TIMEOUT} seconds"
+            )
         
         if result.returncode != 0:
             raise RuntimeError(
                 f"LibreOffice conversion failed: {result.stderr or result.stdout}"
             )
         
-        # Determine output path
-        pdf_path = tmp_in_path.rsplit('.', 1)[0] + '.pdf'
-        
-        # Read output PDF
         if not os.path.exists(pdf_path):
             raise RuntimeError(
                 f"LibreOffice did not create expected output file. "
@@ -201,22 +371,53 @@ def rtf_to_pdf(rtf_content: BytesIO) -> BytesIO:
             )
         
         with open(pdf_path, 'rb') as f:
-            pdf_bytes = BytesIO(f.read())
-        
-        # Cleanup output file
-        os.remove(pdf_path)
-        
-        pdf_bytes.seek(0)
-        return pdf_bytes
+            return BytesIO(f.read())
+
+
+def _convert_with_listener(rtf_data: bytes) -> Optional[bytes]:
+    """
+    Convert RTF through the persistent LibreOffice listener.
+    
+    The document is piped over stdin/stdout, so no temp files are needed.
+    Any failure of the listener path returns None so the caller can use
+    the one-shot fallback; a listener that exited or hung is replaced for
+    the next request.
+    
+    Args:
+        rtf_data: Raw RTF bytes
         
+    Returns:
+        PDF bytes, or None if the listener is unavailable or failed
+    """
+    # A listener that has exited would only make unoconv wait out its
+    # connect attempt against a dead port
+    if _office_listener is None or _office_listener.poll() is not None:
+        if _office_listener is not None:
+            start_office_listener()
+        return None
+    
+    try:
+        result = subprocess.run([
+            'unoconv',
+            '--no-launch',
+            '--server', UNOCONV_HOST,
+            '--port', str(_office_port),
+            '--format', 'pdf',
+            '--stdin',
+            '--stdout',
+        ], input=rtf_data, timeout=LIBREOFFICE_TIMEOUT, capture_output=True)
     except subprocess.TimeoutExpired:
-        raise TimeoutError(
-            f"LibreOffice conversion timed out after {LIBREOFFICE_TIMEOUT} seconds"
-        )
-    finally:
-        # Always cleanup input temp file
-        if os.path.exists(tmp_in_path):
-            os.remove(tmp_in_path)
+        # Hung listener: replace it rather than fail the request
+        stop_office_listener()
+        start_office_listener()
+        return None
+    
+    if result.returncode != 0 or not result.stdout.startswith(b'%PDF'):
+        # Restarts the listener only if it died; a live one is kept
+        start_office_listener()
+        return None
+    
+    return result.stdout
 
 
 def validate_rtf_content(content: bytes) -> bool:
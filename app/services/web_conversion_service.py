@@ -11,18 +11,168 @@ Constraint: All operations use BytesIO (ARCH-01)
 """
 import asyncio
 import ipaddress
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from html import unescape
 from io import BytesIO
-from typing import Optional
-from urllib.parse import urlparse
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import httpx
-import markdown
-from weasyprint import HTML, CSS
+import mistune
+from mistune.core import BlockState
+from mistune.toc import normalize_toc_item, render_toc_ul
+from weasyprint import HTML, CSS, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+
+from app.core.config import settings
 
 
 # Default timeout for URL fetching (seconds)
 DEFAULT_URL_TIMEOUT = 30
 
+# Timeout for each image/stylesheet a page pulls in (WeasyPrint's own default)
+RESOURCE_TIMEOUT = 10
+
+# Hostnames always refused by the SSRF check
+BLOCKED_HOSTNAMES = frozenset({
+    'localhost',
+    '127.0.0.1',
+    '0.0.0.0',
+    '::1',
+    '0:0:0:0:0:0:0:1',
+})
+
+# Domain labels that mark internal services ('foo.local', 'intranet.corp',
+# 'app.internal'); matched per label so 'my-locally-owned.com' is allowed
+INTERNAL_HOST_LABELS = frozenset({'localhost', 'local', 'internal', 'intranet'})
+
+# Hostnames worth handing to ipaddress: dotted digits or IPv6 (has a colon)
+IP_LIKE_RE = re.compile(r'[\d.]+$|.*:')
+
+# Default page stylesheet, parsed once per process rather than per render
+DEFAULT_CSS = CSS(string='''
+    @page {
+        size: A4;
+        margin: 2cm;
+    }
+    body {
+        font-family: sans-serif;
+        line-height: 1.4;
+    }
+''')
+
+# Stylesheet for Markdown output, parsed once and passed alongside
+# DEFAULT_CSS instead of being inlined into every generated document.
+# Fonts name the DejaVu faces installed in the image directly, so fontconfig
+# resolves one family instead of probing a chain of desktop fonts.
+MARKDOWN_CSS = CSS(string='''
+    body {
+        font-family: 'DejaVu Sans', sans-serif;
+        line-height: 1.6;
+        max-width: 100%;
+        color: #333;
+    }
+    h1, h2, h3, h4, h5, h6 {
+        margin-top: 1.5em;
+        margin-bottom: 0.5em;
+        line-height: 1.2;
+    }
+    h1 { font-size: 2em; border-bottom: 1px solid #eee; padding-bottom: 0.3em; }
+    h2 { font-size: 1.5em; border-bottom: 1px solid #eee; padding-bottom: 0.3em; }
+    h3 { font-size: 1.25em; }
+    p { margin: 1em 0; }
+    code {
+        background-color: #f4f4f4;
+        padding: 0.2em 0.4em;
+        border-radius: 3px;
+        font-family: 'DejaVu Sans Mono', monospace;
+        font-size: 0.9em;
+    }
+    pre {
+        background-color: #f4f4f4;
+        padding: 1em;
+        border-radius: 5px;
+        overflow-x: auto;
+        line-height: 1.45;
+    }
+    pre code {
+        background: none;
+        padding: 0;
+    }
+    table {
+        border-collapse: collapse;
+        width: 100%;
+        margin: 1em 0;
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 8px 12px;
+        text-align: left;
+    }
+    th {
+        background-color: #f5f5f5;
+        font-weight: bold;
+    }
+    tr:nth-child(even) {
+        background-color: #fafafa;
+    }
+    blockquote {
+        border-left: 4px solid #ddd;
+        margin: 1em 0;
+        padding-left: 1em;
+        color: #666;
+    }
+    hr {
+        border: none;
+        border-top: 1px solid #eee;
+        margin: 2em 0;
+    }
+    ul, ol {
+        padding-left: 2em;
+        margin: 1em 0;
+    }
+    li {
+        margin: 0.25em 0;
+    }
+    img {
+        max-width: 100%;
+        height: auto;
+    }
+''')
+
+# mistune plugins used for conversion (fenced code is built in)
+MARKDOWN_PLUGINS = ['table', 'strikethrough', 'footnotes', 'task_lists']
+
+# Heading ids cost an extra pass over the headings; they are only needed for
+# a [TOC] marker or for in-document links to heading ids
+TOC_MARKERS = ('[TOC]', '](#')
+
+# Paragraph left by a [TOC] marker, replaced with the rendered contents list
+TOC_PLACEHOLDER = '<p>[TOC]</p>'
+
+# Font configurations wrap a Pango font map, so each rendering thread gets
+# its own
+_font_config_local = threading.local()
+
+# Shared HTTP client so URL fetches reuse pooled connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Event loop thread (and its own pooled client) backing url_to_pdf_sync and
+# resource fetches from render threads, started on first use; clients can't
+# be shared across event loops
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+_sync_http_client: Optional[httpx.AsyncClient] = None
+
+# Rendered URL-to-PDF results (url -> revalidation headers, PDF bytes,
+# expiry), least recently used first; only filled when URL_CACHE_ENABLED
+_url_cache: "OrderedDict[str, Tuple[Dict[str, str], bytes, float]]" = OrderedDict()
+_url_cache_lock = threading.Lock()
+
 
 def _is_safe_url(url: str) -> bool:
     """
@@ -41,7 +191,7 @@ def _is_safe_url(url: str) -> bool:
         bool: True if URL is safe to fetch
     """
     try:
-        parsed = urlparse(url)
+        parsed = urlsplit(url)
     except Exception:
         return False
     
@@ -49,50 +199,272 @@ def _is_safe_url(url: str) -> bool:
     if parsed.scheme not in ('http', 'https'):
         return False
     
-    # Get hostname
-    hostname = parsed.hostname
-    if not hostname:
+    # Get hostname; a trailing dot ('localhost.') names the same host
+    lower_host = (parsed.hostname or '').lower().rstrip('.')
+    if not lower_host:
         return False
     
     # Block common localhost variants
-    blocked_hostnames = {
-        'localhost',
-        '127.0.0.1',
-        '0.0.0.0',
-        '::1',
-        '0:0:0:0:0:0:0:1',
-    }
-    if hostname.lower() in blocked_hostnames:
+    if lower_host in BLOCKED_HOSTNAMES:
         return False
     
-    # Try to parse as IP address and check for private/loopback
-    try:
-        ip = ipaddress.ip_address(hostname)
-        if ip.is_private or ip.is_loopback or ip.is_link_local:
-            return False
-        # Block multicast and reserved
-        if ip.is_multicast or ip.is_reserved:
-            return False
-    except ValueError:
-        # Not an IP address, might be a domain name
-        # Block domains that look like internal services
-        lower_host = hostname.lower()
-        if any(pattern in lower_host for pattern in [
-            'localhost', 'internal', 'local', 'intranet',
-            '.local', '.internal', '.localhost'
-        ]):
-            return False
+    if IP_LIKE_RE.match(lower_host):
+        # Check IP addresses for private/loopback ranges
+        try:
+            ip = ipaddress.ip_address(lower_host)
+        except ValueError:
+            ip = None
+        if ip is not None:
+            if ip.is_private or ip.is_loopback or ip.is_link_local:
+                return False
+            # Block multicast and reserved
+            if ip.is_multicast or ip.is_reserved:
+                return False
+            return True
+    
+    # Not an IP address, might be a domain name.
+    # Block domains that look like internal services
+    if not INTERNAL_HOST_LABELS.isdisjoint(lower_host.split('.')):
+        return False
     
     return True
 
 
-def html_to_pdf(html_content: str, base_url: Optional[str] = None) -> BytesIO:
+def _slugify(text: str) -> str:
+    """Turn rendered heading text into an id the way Python-Markdown's toc did."""
+    value = unicodedata.normalize('NFKD', unescape(text)).encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+    return re.sub(r'[-\s]+', '-', value)
+
+
+def _add_heading_ids(md: mistune.Markdown, state: BlockState) -> None:
+    """
+    mistune hook giving every heading a unique slug id.
+    
+    Ids match the ones Python-Markdown generated ('my-title', 'my-title_1'),
+    so existing in-document links keep working. The headings are also
+    collected into state.env['toc_items'] for a [TOC] marker.
+    
+    Args:
+        md: Markdown instance being rendered
+        state: Parsed block state
+    """
+    used_ids = set()
+    toc_items = []
+    
+    for tok in state.tokens:
+        if tok['type'] != 'heading':
+            continue
+        
+        tok['attrs']['id'] = ''
+        level, _, text = normalize_toc_item(md, tok, parent=state)
+        
+        heading_id = base_id = _slugify(text) or '_'
+        suffix = 0
+        while heading_id in used_ids:
+            suffix += 1
+            heading_id = f'{base_id}_{suffix}'
+        used_ids.add(heading_id)
+        
+        tok['attrs']['id'] = heading_id
+        toc_items.append((level, heading_id, text))
+    
+    state.env['toc_items'] = toc_items
+
+
+# Markdown converters, built once; mistune keeps per-document state in the
+# parse state, so they are safe to share between rendering threads. Raw HTML
+# passes through and single newlines become <br>, as before.
+_markdown = mistune.create_markdown(escape=False, hard_wrap=True, plugins=MARKDOWN_PLUGINS)
+_markdown_toc = mistune.create_markdown(escape=False, hard_wrap=True, plugins=MARKDOWN_PLUGINS)
+_markdown_toc.before_render_hooks.append(_add_heading_ids)
+
+
+def _get_font_config() -> FontConfiguration:
+    """Return this thread's WeasyPrint font configuration, creating it once."""
+    font_config = getattr(_font_config_local, 'font_config', None)
+    if font_config is None:
+        font_config = _font_config_local.font_config = FontConfiguration()
+    return font_config
+
+
+async def _check_request_url(request: httpx.Request) -> None:
+    """
+    httpx request hook applying the SSRF check to every request sent.
+    
+    httpx runs request hooks again for each redirect hop, so a public URL
+    that redirects to a private address is refused before it is fetched.
+    
+    Args:
+        request: Outgoing request, possibly built from a redirect
+        
+    Raises:
+        ValueError: If the request URL is blocked
+    """
+    if not _is_safe_url(str(request.url)):
+        raise ValueError("Blocked redirect to a private or internal URL")
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    """Create a pooled HTTP client for URL fetches."""
+    return httpx.AsyncClient(
+        timeout=DEFAULT_URL_TIMEOUT,
+        follow_redirects=True,
+        event_hooks={'request': [_check_request_url]},
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _new_http_client()
+    return _http_client
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop for blocking fetches, starting it once."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever,
+                name="url-to-pdf-sync",
+                daemon=True,
+            ).start()
+    return _sync_loop
+
+
+def _get_sync_http_client() -> httpx.AsyncClient:
+    """Return the background loop's HTTP client; call only on that loop."""
+    global _sync_http_client
+    if _sync_http_client is None:
+        _sync_http_client = _new_http_client()
+    return _sync_http_client
+
+
+def _url_fetcher(url: str) -> dict:
+    """
+    WeasyPrint URL fetcher that loads http(s) resources over a pooled client.
+    
+    WeasyPrint's default fetcher opens a fresh urllib connection for every
+    image and stylesheet; this reuses keep-alive connections instead and
+    applies the same SSRF check as top-level URLs, on every redirect hop
+    too. Schemes other than http(s) and data: are refused. Rendering runs in a
+    worker thread, so the fetch is run on the background loop and waited on.
+    
+    Args:
+        url: Resource URL requested by WeasyPrint
+        
+    Returns:
+        dict: Resource in WeasyPrint's url_fetcher format
+        
+    Raises:
+        ValueError: If the URL is blocked
+        httpx.HTTPError: If fetch fails
+    """
+    scheme = urlsplit(url).scheme.lower()
+    if scheme == 'data':
+        # Inline data: URIs need no network access
+        return default_url_fetcher(url)
+    
+    if scheme not in ('http', 'https') or not _is_safe_url(url):
+        raise ValueError("Blocked resource URL")
+    
+    async def fetch() -> httpx.Response:
+        return await _get_sync_http_client().get(url, timeout=RESOURCE_TIMEOUT)
+    
+    response = asyncio.run_coroutine_threadsafe(fetch(), _get_sync_loop()).result()
+    response.raise_for_status()
+    
+    return {
+        'string': response.content,
+        'mime_type': response.headers.get('content-type', '').split(';')[0].strip() or None,
+        'encoding': response.charset_encoding,
+        'redirected_url': str(response.url),
+    }
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _url_cache_get(url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+    """
+    Look up a cached rendering of a URL.
+    
+    Args:
+        url: URL that was converted
+        
+    Returns:
+        Optional[Tuple[Dict[str, str], bytes]]: (conditional request headers,
+            PDF bytes), or None if nothing fresh is cached
+    """
+    with _url_cache_lock:
+        entry = _url_cache.get(url)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            del _url_cache[url]
+            return None
+        _url_cache.move_to_end(url)
+        return entry[0], entry[1]
+
+
+def _url_cache_put(url: str, response: httpx.Response, pdf_data: bytes) -> None:
+    """
+    Cache a URL's rendering if the response can be revalidated later.
+    
+    Only responses carrying an ETag or Last-Modified are kept, since a hit
+    is confirmed with a conditional GET before the PDF is reused.
+    
+    Args:
+        url: URL that was converted
+        response: Response the PDF was rendered from
+        pdf_data: Rendered PDF
+    """
+    if 'no-store' in response.headers.get('cache-control', '').lower():
+        return
+    
+    validators = {}
+    if 'etag' in response.headers:
+        validators['If-None-Match'] = response.headers['etag']
+    if 'last-modified' in response.headers:
+        validators['If-Modified-Since'] = response.headers['last-modified']
+    if not validators:
+        return
+    
+    expires = time.monotonic() + settings.URL_CACHE_TTL_SECONDS
+    with _url_cache_lock:
+        _url_cache[url] = (validators, pdf_data, expires)
+        _url_cache.move_to_end(url)
+        while len(_url_cache) > settings.URL_CACHE_MAX_ENTRIES:
+            _url_cache.popitem(last=False)
+
+
+def html_to_pdf(
+    html_content: Union[str, bytes],
+    base_url: Optional[str] = None,
+    stylesheets: Optional[List[CSS]] = None,
+    encoding: Optional[str] = None
+) -> BytesIO:
     """
     Convert HTML content to PDF.
     
+    Raw bytes are handed to WeasyPrint's parser undecoded; it sniffs the
+    encoding itself (BOM, <meta charset>) unless one is given.
+    
     Args:
-        html_content: HTML string to convert
+        html_content: HTML string or raw HTML bytes to convert
         base_url: Optional base URL for resolving relative URLs
+        stylesheets: Optional pre-parsed stylesheets applied after DEFAULT_CSS
+        encoding: Optional encoding of raw bytes, e.g. from a Content-Type header
         
     Returns:
         BytesIO: PDF document
@@ -100,22 +472,23 @@ def html_to_pdf(html_content: str, base_url: Optional[str] = None) -> BytesIO:
     output = BytesIO()
     
     # Create HTML document
-    html = HTML(string=html_content, base_url=base_url)
-    
-    # Use default CSS for better rendering
-    default_css = CSS(string='''
-        @page {
-            size: A4;
-            margin: 2cm;
-        }
-        body {
-            font-family: sans-serif;
-            line-height: 1.4;
-        }
-    ''')
-    
-    # Write PDF
-    html.write_pdf(output, stylesheets=[default_css])
+    if isinstance(html_content, bytes):
+        html = HTML(
+            file_obj=BytesIO(html_content),
+            encoding=encoding,
+            base_url=base_url,
+            url_fetcher=_url_fetcher
+        )
+    else:
+        html = HTML(string=html_content, base_url=base_url, url_fetcher=_url_fetcher)
+    
+    # Write PDF with the pre-parsed default CSS, reusing this thread's
+    # font configuration so font discovery isn't repeated per render
+    html.write_pdf(
+        output,
+        stylesheets=[DEFAULT_CSS, *(stylesheets or [])],
+        font_config=_get_font_config(),
+    )
     
     output.seek(0)
     return output
@@ -126,7 +499,8 @@ def markdown_to_pdf(markdown_content: str) -> BytesIO:
     Convert Markdown content to PDF.
     
     Converts Markdown to HTML first, then to PDF.
-    Supports common Markdown extensions: tables, code blocks, TOC.
+    Supports common Markdown extensions: tables, code blocks, footnotes,
+    task lists, strikethrough, TOC.
     
     Args:
         markdown_content: Markdown string to convert
@@ -134,19 +508,16 @@ def markdown_to_pdf(markdown_content: str) -> BytesIO:
     Returns:
         BytesIO: PDF document
     """
-    # Convert markdown to HTML with extensions
-    html_content = markdown.markdown(
-        markdown_content,
-        extensions=[
-            'tables',
-            'fenced_code',
-            'toc',
-            'nl2br',  # Newline to <br>
-            'sane_lists',  # Better list handling
-        ]
-    )
+    # Convert markdown to HTML with the prebuilt converter
+    if any(marker in markdown_content for marker in TOC_MARKERS):
+        html_content, state = _markdown_toc.parse(markdown_content)
+        if TOC_PLACEHOLDER in html_content:
+            toc_html = f'<div class="toc">\n{render_toc_ul(state.env["toc_items"])}</div>'
+            html_content = html_content.replace(TOC_PLACEHOLDER, toc_html)
+    else:
+        html_content = _markdown(markdown_content)
     
-    # Wrap in styled HTML document
+    # Wrap in HTML document; styling comes from MARKDOWN_CSS
     styled_html = f'''<!DOCTYPE html>
 <html>
 <head>
@@ -154,95 +525,58 @@ def markdown_to_pdf(markdown_content: str) -> BytesIO:
     <title>Converted Document</title>
 </head>
 <body>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 
-                         'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            max-width: 100%;
-            color: #333;
-        }}
-        h1, h2, h3, h4, h5, h6 {{
-            margin-top: 1.5em;
-            margin-bottom: 0.5em;
-            line-height: 1.2;
-        }}
-        h1 {{ font-size: 2em; border-bottom: 1px solid #eee; padding-bottom: 0.3em; }}
-        h2 {{ font-size: 1.5em; border-bottom: 1px solid #eee; padding-bottom: 0.3em; }}
-        h3 {{ font-size: 1.25em; }}
-        p {{ margin: 1em 0; }}
-        code {{
-            background-color: #f4f4f4;
-            padding: 0.2em 0.4em;
-            border-radius: 3px;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-            font-size: 0.9em;
-        }}
-        pre {{
-            background-color: #f4f4f4;
-            padding: 1em;
-            border-radius: 5px;
-            overflow-x: auto;
-            line-height: 1.45;
-        }}
-        pre code {{
-            background: none;
-            padding: 0;
-        }}
-        table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 1em 0;
-        }}
-        th, td {{
-            border: 1px solid #ddd;
-            padding: 8px 12px;
-            text-align: left;
-        }}
-        th {{
-            background-color: #f5f5f5;
-            font-weight: bold;
-        }}
-        tr:nth-child(even) {{
-            background-color: #fafafa;
-        }}
-        blockquote {{
-            border-left: 4px solid #ddd;
-            margin: 1em 0;
-            padding-left: 1em;
-            color: #666;
-        }}
-        hr {{
-            border: none;
-            border-top: 1px solid #eee;
-            margin: 2em 0;
-        }}
-        ul, ol {{
-            padding-left: 2em;
-            margin: 1em 0;
-        }}
-        li {{
-            margin: 0.25em 0;
-        }}
-        img {{
-            max-width: 100%;
-            height: auto;
-        }}
-    </style>
     {html_content}
 </body>
 </html>'''
     
-    return html_to_pdf(styled_html)
+    return html_to_pdf(styled_html, stylesheets=[MARKDOWN_CSS])
 
 
-async def url_to_pdf(url: str, timeout: int = DEFAULT_URL_TIMEOUT) -> BytesIO:
+async def html_to_pdf_async(
+    html_content: str,
+    base_url: Optional[str] = None
+) -> BytesIO:
+    """
+    Convert HTML content to PDF in a worker thread.
+    
+    Rendering can take seconds; running it in a thread keeps the event
+    loop free to serve other requests meanwhile.
+    
+    Args:
+        html_content: HTML string to convert
+        base_url: Optional base URL for resolving relative URLs
+        
+    Returns:
+        BytesIO: PDF document
+    """
+    return await asyncio.to_thread(html_to_pdf, html_content, base_url)
+
+
+async def markdown_to_pdf_async(markdown_content: str) -> BytesIO:
+    """
+    Convert Markdown content to PDF in a worker thread.
+    
+    Args:
+        markdown_content: Markdown string to convert
+        
+    Returns:
+        BytesIO: PDF document
+    """
+    return await asyncio.to_thread(markdown_to_pdf, markdown_content)
+
+
+async def url_to_pdf(
+    url: str,
+    timeout: int = DEFAULT_URL_TIMEOUT,
+    client: Optional[httpx.AsyncClient] = None
+) -> BytesIO:
     """
     Fetch URL and convert to PDF.
     
     Args:
         url: URL to fetch and convert
         timeout: Fetch timeout in seconds
+        client: HTTP client to fetch with (defaults to the shared client)
         
     Returns:
         BytesIO: PDF document
@@ -258,14 +592,32 @@ async def url_to_pdf(url: str, timeout: int = DEFAULT_URL_TIMEOUT) -> BytesIO:
             "Private IPs, localhost, and internal URLs are blocked."
         )
     
-    # Fetch HTML content
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        html_content = response.text
+    # With a cached rendering, ask the server whether the page changed
+    cached = _url_cache_get(url) if settings.URL_CACHE_ENABLED else None
+    
+    # Fetch HTML content over the pooled client
+    client = client or _get_http_client()
+    response = await client.get(
+        url,
+        timeout=timeout,
+        headers=cached[0] if cached else None
+    )
+    if cached and response.status_code == 304:
+        return BytesIO(cached[1])
+    response.raise_for_status()
+    
+    # Convert the raw body to PDF with original URL as base, off the event
+    # loop; skipping response.text avoids a charset-detect/decode pass
+    output = await asyncio.to_thread(
+        html_to_pdf,
+        response.content,
+        base_url=url,
+        encoding=response.charset_encoding
+    )
     
-    # Convert to PDF with original URL as base
-    return html_to_pdf(html_content, base_url=url)
+    if settings.URL_CACHE_ENABLED:
+        _url_cache_put(url, response, output.getvalue())
+    return output
 
 
 # Synchronous wrapper for async function (for use in non-async contexts)
@@ -280,4 +632,10 @@ def url_to_pdf_sync(url: str, timeout: int = DEFAULT_URL_TIMEOUT) -> BytesIO:
     Returns:
         BytesIO: PDF document
     """
-    return asyncio.run(url_to_pdf(url, timeout))
+    async def fetch_and_convert() -> BytesIO:
+        # Runs on the background loop, so its client is created there too
+        return await url_to_pdf(url, timeout, client=_get_sync_http_client())
+    
+    # Reuse one long-lived loop instead of building one per call
+    future = asyncio.run_coroutine_threadsafe(fetch_and_convert(), _get_sync_loop())
+    return future.result()
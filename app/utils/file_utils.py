@@ -8,14 +8,19 @@ Reference: ARCH-01, ARCH-06
 """
 import zipfile
 import os
+import shutil
+import tempfile
 from io import BytesIO
-from typing import List, Tuple, Optional
+from typing import TYPE_CHECKING, BinaryIO, Iterator, List, Tuple, Optional
 from pathlib import Path
 
 from fastapi import UploadFile, HTTPException
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    import pikepdf
+
 
 # Allowed MIME types for uploads
 ALLOWED_PDF_TYPES = {"application/pdf"}
@@ -34,10 +39,36 @@ ALLOWED_OFFICE_TYPES = {
 }
 ALLOWED_ALL_TYPES = ALLOWED_PDF_TYPES | ALLOWED_IMAGE_TYPES | ALLOWED_OFFICE_TYPES
 
+# File category accepted by validate_any_file, keyed by content type
+FILE_CATEGORIES = {
+    **{content_type: 'pdf' for content_type in ALLOWED_PDF_TYPES},
+    **{content_type: 'image' for content_type in ALLOWED_IMAGE_TYPES},
+}
+
+# Uploads are read in chunks of this size while checking the size limit
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Responses are streamed to the client in chunks of this size
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Leading magic bytes of supported image formats (WebP is checked separately
+# since its signature is split around the RIFF chunk size)
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+)
+
 
 class FileValidationError(HTTPException):
     """Raised when file validation fails."""
-    pass
+    
+    def __reduce__(self):
+        # HTTPException can't be rebuilt from args; needed to re-raise
+        # errors from worker processes
+        return (self.__class__, (self.status_code, self.detail, self.headers))
 
 
 class InvalidPageError(Exception):
@@ -55,6 +86,51 @@ class EmptyResultError(Exception):
     pass
 
 
+async def _read_upload(file: UploadFile) -> bytes:
+    """
+    Read an upload in chunks, stopping as soon as it exceeds the size limit.
+    
+    The upload is already spooled by the form parser, so its size is checked
+    first without reading anything; the chunked read still enforces the limit
+    should the size be unknown.
+    
+    Args:
+        file: UploadFile from FastAPI
+        
+    Returns:
+        bytes: File content
+        
+    Raises:
+        FileValidationError: If file is too large or empty
+    """
+    # Reject oversized uploads in constant time and memory
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE_BYTES:
+        raise FileValidationError(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
+        )
+    
+    chunks = []
+    size = 0
+    
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.MAX_UPLOAD_SIZE_BYTES:
+            raise FileValidationError(
+                status_code=413,
+                detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
+            )
+        chunks.append(chunk)
+    
+    if size == 0:
+        raise FileValidationError(
+            status_code=400,
+            detail="Empty file provided."
+        )
+    
+    return b"".join(chunks)
+
+
 async def validate_pdf(file: UploadFile) -> BytesIO:
     """
     Validate PDF file and return as BytesIO for in-memory processing.
@@ -78,22 +154,8 @@ async def validate_pdf(file: UploadFile) -> BytesIO:
                 detail=f"Invalid file type: {file.content_type}. Expected PDF."
             )
     
-    # Read file content
-    content = await file.read()
-    
-    # Check file size
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    # Check if empty
-    if len(content) == 0:
-        raise FileValidationError(
-            status_code=400,
-            detail="Empty file provided."
-        )
+    # Read file content, rejecting oversized or empty uploads
+    content = await _read_upload(file)
     
     # Basic PDF header check
     if not content.startswith(b'%PDF-'):
@@ -129,22 +191,8 @@ async def validate_image(file: UploadFile) -> Tuple[BytesIO, str]:
                 detail=f"Invalid file type: {file.content_type}. Expected image."
             )
     
-    # Read file content
-    content = await file.read()
-    
-    # Check file size
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    # Check if empty
-    if len(content) == 0:
-        raise FileValidationError(
-            status_code=400,
-            detail="Empty file provided."
-        )
+    # Read file content, rejecting oversized or empty uploads
+    content = await _read_upload(file)
     
     # Detect format from content
     detected_format = detect_image_format(content)
@@ -159,21 +207,18 @@ async def validate_any_file(file: UploadFile) -> Tuple[BytesIO, str]:
     Returns:
         Tuple[BytesIO, str]: (File content, file type category: 'pdf' or 'image')
     """
-    if file.content_type in ALLOWED_PDF_TYPES:
+    category = FILE_CATEGORIES.get(file.content_type)
+    if category is None:
+        # Unknown content type: fall back to the extension
+        filename = file.filename or ""
+        category = 'pdf' if filename.lower().endswith('.pdf') else 'image'
+    
+    if category == 'pdf':
         content = await validate_pdf(file)
         return content, 'pdf'
-    elif file.content_type in ALLOWED_IMAGE_TYPES:
-        content, _ = await validate_image(file)
-        return content, 'image'
-    else:
-        # Check extension
-        filename = file.filename or ""
-        if filename.lower().endswith('.pdf'):
-            content = await validate_pdf(file)
-            return content, 'pdf'
-        else:
-            content, _ = await validate_image(file)
-            return content, 'image'
+    
+    content, _ = await validate_image(file)
+    return content, 'image'
 
 
 def detect_image_format(content: bytes) -> str:
@@ -186,18 +231,16 @@ def detect_image_format(content: bytes) -> str:
     Returns:
         str: Detected format (png, jpeg, gif, webp, bmp, or unknown)
     """
-    if content.startswith(b'\x89PNG\r\n\x1a\n'):
-        return 'png'
-    elif content.startswith(b'\xff\xd8\xff'):
-        return 'jpeg'
-    elif content.startswith(b'GIF87a') or content.startswith(b'GIF89a'):
-        return 'gif'
-    elif content.startswith(b'RIFF') and content[8:12] == b'WEBP':
+    header = content[:12]
+    
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
         return 'webp'
-    elif content.startswith(b'BM'):
-        return 'bmp'
-    else:
-        return 'unknown'
+    
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    
+    return 'unknown'
 
 
 def generate_filename(operation: str, original_name: str, suffix: str = "") -> str:
@@ -219,6 +262,76 @@ def generate_filename(operation: str, original_name: str, suffix: str = "") -> s
     return f"{base}_{operation}.pdf"
 
 
+def create_output_buffer() -> tempfile.SpooledTemporaryFile:
+    """
+    Create a buffer for a generated PDF.
+    
+    Small outputs stay in memory; anything past SPOOL_MAX_SIZE_MB spills
+    to an unnamed file in SPOOL_DIR (tmpfs in the container) so large
+    results don't fragment the Python heap.
+    
+    Returns:
+        SpooledTemporaryFile: Empty read/write binary buffer
+    """
+    return tempfile.SpooledTemporaryFile(
+        max_size=settings.SPOOL_MAX_SIZE_MB * 1024 * 1024,
+        dir=settings.SPOOL_DIR,
+    )
+
+
+def iter_file(file: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a result buffer in fixed-size chunks for a StreamingResponse.
+    
+    Handing StreamingResponse the file object itself makes it iterate line
+    by line, and binary PDF data splits into tens of thousands of tiny
+    chunks, each sent through the threadpool. The buffer is closed once
+    sent, which also removes a spooled file from disk.
+    
+    Args:
+        file: Result buffer positioned at its start
+        chunk_size: Bytes per chunk
+        
+    Yields:
+        bytes: Next chunk of the file
+    """
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+def open_pdf(file: BytesIO, **kwargs) -> "pikepdf.Pdf":
+    """
+    Open an in-memory PDF with pikepdf through a memory-mapped file.
+    
+    pikepdf reads a BytesIO through one Python seek/readinto call per
+    qpdf read, which dominates on large files. Writing the content once to
+    SPOOL_DIR (tmpfs in the container) and mapping it lets qpdf read
+    directly and fault in only the objects it needs. The temp file is
+    unlinked as soon as the PDF is open; the mapping keeps the data alive.
+    
+    Args:
+        file: PDF content as BytesIO
+        **kwargs: Extra arguments for pikepdf.Pdf.open (e.g. password)
+        
+    Returns:
+        pikepdf.Pdf: Open PDF, to be closed by the caller
+    """
+    import pikepdf
+    
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(dir=settings.SPOOL_DIR, suffix='.pdf') as tmp:
+        tmp.write(file.read())
+        tmp.flush()
+        return pikepdf.Pdf.open(
+            tmp.name,
+            access_mode=pikepdf.AccessMode.mmap,
+            **kwargs
+        )
+
+
 def create_zip_archive(files: List[Tuple[str, BytesIO]]) -> BytesIO:
     """
     Create an in-memory ZIP archive from list of files.
@@ -231,10 +344,16 @@ def create_zip_archive(files: List[Tuple[str, BytesIO]]) -> BytesIO:
     """
     zip_buffer = BytesIO()
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+    # Level 1 deflate: most of the size win on partly uncompressed PDFs
+    # (stored entries came out ~9x larger) at a quarter of the default cost
+    with zipfile.ZipFile(
+        zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as zf:
         for filename, content in files:
             content.seek(0)
-            zf.writestr(filename, content.read())
+            # Stream each entry in chunks instead of reading it whole first
+            with zf.open(filename, 'w', force_zip64=True) as entry:
+                shutil.copyfileobj(content, entry, UPLOAD_CHUNK_SIZE)
     
     zip_buffer.seek(0)
     return zip_buffer
@@ -250,10 +369,13 @@ def get_page_count(pdf_bytes: BytesIO) -> int:
     Returns:
         int: Number of pages
     """
-    import pikepdf
-    
-    pdf_bytes.seek(0)
-    with pikepdf.Pdf.open(pdf_bytes) as pdf:
+    # Nothing touches the pages, so skip pushing inherited attributes down
+    # and read /Count off the page tree root instead of walking the tree
+    with open_pdf(pdf_bytes, inherit_page_attributes=False) as pdf:
+        count = pdf.Root.Pages.get('/Count')
+        if isinstance(count, int) and count > 0:
+            return count
+        # Missing or broken /Count: fall back to counting the pages
         return len(pdf.pages)
 
 
@@ -275,12 +397,43 @@ def validate_page_numbers(pages: List[int], total_pages: int) -> None:
             )
 
 
-async def validate_docx(file: UploadFile) -> BytesIO:
+# Office formats: accepted MIME types, file extensions and display name.
+# All of them (OOXML) are ZIP containers starting with the 'PK' signature.
+OFFICE_FORMATS = {
+    "docx": (
+        {
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            "application/msword",
+        },
+        ('.docx', '.doc'),
+        "Word document",
+    ),
+    "xlsx": (
+        {
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "application/vnd.ms-excel",
+        },
+        ('.xlsx', '.xls'),
+        "Excel spreadsheet",
+    ),
+    "pptx": (
+        {
+            "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            "application/vnd.ms-powerpoint",
+        },
+        ('.pptx', '.ppt'),
+        "PowerPoint presentation",
+    ),
+}
+
+
+async def _validate_office(file: UploadFile, office_format: str) -> BytesIO:
     """
-    Validate Word document (.docx) and return as BytesIO.
+    Validate an Office document and return as BytesIO.
     
     Args:
         file: UploadFile from FastAPI
+        office_format: Key into OFFICE_FORMATS (docx, xlsx, pptx)
         
     Returns:
         BytesIO: File content in memory
@@ -288,129 +441,42 @@ async def validate_docx(file: UploadFile) -> BytesIO:
     Raises:
         FileValidationError: If file is invalid
     """
-    # Check content type or extension
-    valid_types = {
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    }
+    valid_types, extensions, kind = OFFICE_FORMATS[office_format]
     
+    # Check content type or extension
     filename = file.filename or ""
-    if file.content_type not in valid_types and not filename.lower().endswith(('.docx', '.doc')):
+    if file.content_type not in valid_types and not filename.lower().endswith(extensions):
         raise FileValidationError(
             status_code=415,
-            detail=f"Invalid file type: {file.content_type}. Expected Word document."
+            detail=f"Invalid file type: {file.content_type}. Expected {kind}."
         )
     
-    content = await file.read()
-    
-    # Check file size
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    if len(content) == 0:
-        raise FileValidationError(status_code=400, detail="Empty file provided.")
+    # Read file content, rejecting oversized or empty uploads
+    content = await _read_upload(file)
     
     # Check for Office file signature (ZIP format)
     if not content.startswith(b'PK'):
         raise FileValidationError(
             status_code=400,
-            detail="Invalid Word document. File does not have expected format."
+            detail=f"Invalid {kind}. File does not have expected format."
         )
     
     return BytesIO(content)
 
 
+async def validate_docx(file: UploadFile) -> BytesIO:
+    """Validate Word document (.docx) and return as BytesIO."""
+    return await _validate_office(file, "docx")
+
+
 async def validate_xlsx(file: UploadFile) -> BytesIO:
-    """
-    Validate Excel spreadsheet (.xlsx) and return as BytesIO.
-    
-    Args:
-        file: UploadFile from FastAPI
-        
-    Returns:
-        BytesIO: File content in memory
-        
-    Raises:
-        FileValidationError: If file is invalid
-    """
-    valid_types = {
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "application/vnd.ms-excel",
-    }
-    
-    filename = file.filename or ""
-    if file.content_type not in valid_types and not filename.lower().endswith(('.xlsx', '.xls')):
-        raise FileValidationError(
-            status_code=415,
-            detail=f"Invalid file type: {file.content_type}. Expected Excel spreadsheet."
-        )
-    
-    content = await file.read()
-    
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    if len(content) == 0:
-        raise FileValidationError(status_code=400, detail="Empty file provided.")
-    
-    if not content.startswith(b'PK'):
-        raise FileValidationError(
-            status_code=400,
-            detail="Invalid Excel file. File does not have expected format."
-        )
-    
-    return BytesIO(content)
+    """Validate Excel spreadsheet (.xlsx) and return as BytesIO."""
+    return await _validate_office(file, "xlsx")
 
 
 async def validate_pptx(file: UploadFile) -> BytesIO:
-    """
-    Validate PowerPoint presentation (.pptx) and return as BytesIO.
-    
-    Args:
-        file: UploadFile from FastAPI
-        
-    Returns:
-        BytesIO: File content in memory
-        
-    Raises:
-        FileValidationError: If file is invalid
-    """
-    valid_types = {
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        "application/vnd.ms-powerpoint",
-    }
-    
-    filename = file.filename or ""
-    if file.content_type not in valid_types and not filename.lower().endswith(('.pptx', '.ppt')):
-        raise FileValidationError(
-            status_code=415,
-            detail=f"Invalid file type: {file.content_type}. Expected PowerPoint presentation."
-        )
-    
-    content = await file.read()
-    
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    if len(content) == 0:
-        raise FileValidationError(status_code=400, detail="Empty file provided.")
-    
-    if not content.startswith(b'PK'):
-        raise FileValidationError(
-            status_code=400,
-            detail="Invalid PowerPoint file. File does not have expected format."
-        )
-    
-    return BytesIO(content)
+    """Validate PowerPoint presentation (.pptx) and return as BytesIO."""
+    return await _validate_office(file, "pptx")
 
 
 async def validate_rtf(file: UploadFile) -> BytesIO:
@@ -435,16 +501,8 @@ async def validate_rtf(file: UploadFile) -> BytesIO:
             detail=f"Invalid file type: {file.content_type}. Expected RTF document."
         )
     
-    content = await file.read()
-    
-    if len(content) > settings.MAX_UPLOAD_SIZE_BYTES:
-        raise FileValidationError(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_FILE_SIZE_MB}MB."
-        )
-    
-    if len(content) == 0:
-        raise FileValidationError(status_code=400, detail="Empty file provided.")
+    # Read file content, rejecting oversized or empty uploads
+    content = await _read_upload(file)
     
     # RTF files start with {\rtf1
     if not content.startswith(b'{\\rtf'):
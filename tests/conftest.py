@@ -7,8 +7,10 @@ import os
 import sys
 from io import BytesIO
 from pathlib import Path
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator, Dict, Generator, Optional, Tuple
 
+import httpx
+import pikepdf
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
@@ -18,126 +20,78 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.main import app
 
+# uvloop comes with uvicorn[standard] on Linux/macOS; use it for the test
+# loop too when it's there, so tests run on the same loop as the server
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+if uvloop is not None:
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests and fixtures on uvloop."""
+        return {"uvloop": uvloop.new_event_loop}
+
 
 # ==================== Fixtures ====================
+# Sample file fixtures return immutable bytes, so they are built once per
+# session; tests wrap them in their own BytesIO.
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client() -> AsyncGenerator[AsyncClient, None]:
-    """Create async test client."""
+    """Create one async test client shared by the whole session."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
-@pytest.fixture
+def _text_pdf(*lines: str) -> bytes:
+    """
+    Build a PDF with one page per line of text, each set in Helvetica.
+    
+    pikepdf writes the xref, so the result opens without qpdf having to
+    reconstruct it (hand-written offsets were off and forced that on
+    every open).
+    """
+    pdf = pikepdf.Pdf.new()
+    font = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font,
+        Subtype=pikepdf.Name.Type1,
+        BaseFont=pikepdf.Name.Helvetica,
+    ))
+    for line in lines:
+        page = pdf.add_blank_page(page_size=(612, 792))
+        page.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        page.Contents = pdf.make_stream(
+            f"BT\n/F1 12 Tf\n100 700 Td\n({line}) Tj\nET".encode()
+        )
+    
+    output = BytesIO()
+    pdf.save(output)
+    return output.getvalue()
+
+
+@pytest.fixture(scope="session")
 def sample_pdf_bytes() -> bytes:
     """
     Create a minimal valid PDF for testing.
     
-    This is the smallest valid PDF that contains:
-    - PDF header
+    This is a small valid PDF that contains:
     - One page with "Hello World" text
-    - PDF trailer
+    - A consistent xref table and trailer
     """
-    pdf_content = b"""%PDF-1.4
-1 0 obj
-<< /Type /Catalog /Pages 2 0 R >>
-endobj
-2 0 obj
-<< /Type /Pages /Kids [3 0 R] /Count 1 >>
-endobj
-3 0 obj
-<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>
-endobj
-4 0 obj
-<< /Length 44 >>
-stream
-BT
-/F1 12 Tf
-100 700 Td
-(Hello World) Tj
-ET
-endstream
-endobj
-5 0 obj
-<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>
-endobj
-xref
-0 6
-0000000000 65535 f 
-0000000009 00000 n 
-0000000058 00000 n 
-0000000115 00000 n 
-0000000266 00000 n 
-0000000360 00000 n 
-trailer
-<< /Size 6 /Root 1 0 R >>
-startxref
-433
-%%EOF
-"""
-    return pdf_content
+    return _text_pdf("Hello World")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_pdf_two_pages() -> bytes:
     """Create a PDF with two pages for testing merge/split operations."""
-    pdf_content = b"""%PDF-1.4
-1 0 obj
-<< /Type /Catalog /Pages 2 0 R >>
-endobj
-2 0 obj
-<< /Type /Pages /Kids [3 0 R 6 0 R] /Count 2 >>
-endobj
-3 0 obj
-<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>
-endobj
-4 0 obj
-<< /Length 44 >>
-stream
-BT
-/F1 12 Tf
-100 700 Td
-(Page One) Tj
-ET
-endstream
-endobj
-5 0 obj
-<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>
-endobj
-6 0 obj
-<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 7 0 R /Resources << /Font << /F1 5 0 R >> >> >>
-endobj
-7 0 obj
-<< /Length 44 >>
-stream
-BT
-/F1 12 Tf
-100 700 Td
-(Page Two) Tj
-ET
-endstream
-endobj
-xref
-0 8
-0000000000 65535 f 
-0000000009 00000 n 
-0000000058 00000 n 
-0000000119 00000 n 
-0000000270 00000 n 
-0000000364 00000 n 
-0000000437 00000 n 
-0000000588 00000 n 
-trailer
-<< /Size 8 /Root 1 0 R >>
-startxref
-682
-%%EOF
-"""
-    return pdf_content
+    return _text_pdf("Page One", "Page Two")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_png_bytes() -> bytes:
     """
     Create a minimal valid PNG image for testing.
@@ -175,7 +129,7 @@ def sample_png_bytes() -> bytes:
     return png_header + ihdr + idat + iend
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_jpg_bytes() -> bytes:
     """
     Create a minimal valid JPEG image for testing.
@@ -216,6 +170,27 @@ def sample_jpg_bytes() -> bytes:
     ])
 
 
+@pytest.fixture(scope="session")
+def merge_upload(
+    sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Multipart body merging the two sample PDFs, encoded once per session.
+    
+    httpx re-encodes files= uploads on every request, and their BytesIO
+    readers are spent after one use; the encoded body can be posted any
+    number of times with content=.
+    
+    Returns:
+        Tuple of (body, headers carrying its multipart content type)
+    """
+    request = httpx.Request("POST", "http://test/api/v1/pdf/merge", files=[
+        ("files", ("test1.pdf", sample_pdf_bytes, "application/pdf")),
+        ("files", ("test2.pdf", sample_pdf_two_pages, "application/pdf")),
+    ])
+    return request.read(), {"content-type": request.headers["content-type"]}
+
+
 # ==================== Helper Functions ====================
 
 def create_upload_file(content: bytes, filename: str, content_type: str = "application/pdf"):
@@ -224,7 +199,33 @@ def create_upload_file(content: bytes, filename: str, content_type: str = "appli
     return (filename, BytesIO(content), content_type)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def fixtures_dir() -> Path:
     """Get the fixtures directory path."""
     return Path(__file__).parent / "fixtures"
+
+
+# ==================== Deployment Files ====================
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _read_optional(path: Path) -> Optional[str]:
+    """File contents, or None if the file isn't there (e.g. in the image)."""
+    # One open instead of exists() + read, with no gap between the two
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return None
+
+
+@pytest.fixture(scope="session")
+def compose_text() -> Optional[str]:
+    """docker-compose.yml, read once per session."""
+    return _read_optional(PROJECT_ROOT / "docker-compose.yml")
+
+
+@pytest.fixture(scope="session")
+def dockerfile_text() -> Optional[str]:
+    """Dockerfile, read once per session."""
+    return _read_optional(PROJECT_ROOT / "Dockerfile")
@@ -6,20 +6,17 @@ Tests verify all endpoints exist and respond correctly.
 from io import BytesIO
 import json
 
-import pytest
 from httpx import AsyncClient
 
 
 class TestHealthEndpoint:
     """Test health check endpoint."""
     
-    @pytest.mark.asyncio
     async def test_health_endpoint_exists(self, client: AsyncClient):
         """GET /health returns 200."""
         response = await client.get("/health")
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_health_returns_json(self, client: AsyncClient):
         """Health endpoint returns JSON."""
         response = await client.get("/health")
@@ -31,20 +28,15 @@ class TestHealthEndpoint:
 class TestPDFEndpoints:
     """Test PDF API endpoints exist and respond."""
     
-    @pytest.mark.asyncio
     async def test_merge_endpoint_exists(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+        self, client: AsyncClient, merge_upload: tuple
     ):
         """POST /api/v1/pdf/merge returns 200."""
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        body, headers = merge_upload
         
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_split_endpoint_exists(
         self, client: AsyncClient, sample_pdf_two_pages: bytes
     ):
@@ -57,7 +49,6 @@ class TestPDFEndpoints:
         response = await client.post("/api/v1/pdf/split", files=files, data=data)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_rotate_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -70,7 +61,6 @@ class TestPDFEndpoints:
         response = await client.post("/api/v1/pdf/rotate", files=files, data=data)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_compress_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -83,7 +73,6 @@ class TestPDFEndpoints:
         response = await client.post("/api/v1/pdf/compress", files=files, data=data)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_password_add_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -96,7 +85,6 @@ class TestPDFEndpoints:
         response = await client.post("/api/v1/pdf/password/add", files=files, data=data)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_watermark_text_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -110,7 +98,6 @@ class TestPDFEndpoints:
         response = await client.post("/api/v1/pdf/watermark/text", files=files, data=data)
         assert response.status_code == 200
         
-    @pytest.mark.asyncio
     async def test_extract_text_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -126,7 +113,6 @@ class TestPDFEndpoints:
 class TestFileValidation:
     """Test file type validation."""
     
-    @pytest.mark.asyncio
     async def test_non_pdf_rejected(self, client: AsyncClient):
         """Non-PDF file is rejected with 415."""
         files = [
@@ -136,7 +122,6 @@ class TestFileValidation:
         response = await client.post("/api/v1/pdf/merge", files=files)
         assert response.status_code in [400, 415]
         
-    @pytest.mark.asyncio
     async def test_invalid_pdf_rejected(self, client: AsyncClient):
         """Invalid PDF content is rejected."""
         files = [
@@ -146,7 +131,6 @@ class TestFileValidation:
         response = await client.post("/api/v1/pdf/merge", files=files)
         assert response.status_code == 400
         
-    @pytest.mark.asyncio
     async def test_merge_requires_multiple_files(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -162,7 +146,6 @@ class TestFileValidation:
 class TestImageEndpoints:
     """Test Image API endpoints."""
     
-    @pytest.mark.asyncio
     async def test_pdf_to_images_endpoint_exists(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -177,7 +160,6 @@ class TestImageEndpoints:
         # But endpoint should exist
         assert response.status_code in [200, 500]  # 500 if poppler missing
         
-    @pytest.mark.asyncio
     async def test_images_to_pdf_endpoint_exists(
         self, client: AsyncClient, sample_png_bytes: bytes
     ):
@@ -6,20 +6,49 @@ ensuring all operations work end-to-end with zero-trace guarantees.
 
 Reference: All PDF-*, IMG-*, ARCH-* requirements
 """
+import asyncio
 from io import BytesIO
 import json
+import zipfile
 
+import fitz  # PyMuPDF
 import pytest
 from httpx import AsyncClient
 import pikepdf
 
+from app.utils import get_page_count
+
+
+# Leading signature bytes of the result formats checked below
+MAGIC = {
+    "pdf": b'%PDF-',
+    "png": b'\x89PNG\r\n\x1a\n',
+}
+
+
+def _is_magic(content: bytes, kind: str) -> bool:
+    """Whether content starts with the signature of the given format."""
+    return content.startswith(MAGIC[kind])
+
+
+def _page_count(content: bytes) -> int:
+    """Page count of a result from /Pages /Count, without walking the page tree."""
+    return get_page_count(BytesIO(content))
+
+
+def _open_fast(content: bytes, password: str = "") -> pikepdf.Pdf:
+    """Open a result PDF without xref recovery, so a damaged result fails loudly."""
+    return pikepdf.Pdf.open(
+        BytesIO(content), password=password,
+        attempt_recovery=False, suppress_warnings=True,
+    )
+
 
 class TestFullMergeWorkflow:
     """Test complete merge workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_merge_workflow(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+        self, client: AsyncClient, merge_upload: tuple
     ):
         """
         Test complete merge workflow:
@@ -29,21 +58,19 @@ class TestFullMergeWorkflow:
         4. Verify result is valid PDF
         5. Verify cleanup (handled by zero-trace architecture)
         """
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        body, headers = merge_upload
         
         # Upload and merge
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
         assert response.status_code == 200, f"Merge failed: {response.text}"
         
         # Verify response is PDF
         content = response.content
-        assert content.startswith(b'%PDF-'), "Response should be a PDF"
+        assert _is_magic(content, "pdf"), "Response should be a PDF"
         
-        # Verify merged PDF has content from both files
-        pdf = pikepdf.Pdf.open(BytesIO(content))
+        # Verify merged PDF has content from both files; this one does a full
+        # pikepdf round trip to guard structural integrity
+        pdf = _open_fast(content)
         assert len(pdf.pages) >= 2, "Merged PDF should have at least 2 pages"
         pdf.close()
         
@@ -54,7 +81,6 @@ class TestFullMergeWorkflow:
 class TestFullSplitWorkflow:
     """Test complete split workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_split_workflow(
         self, client: AsyncClient, sample_pdf_two_pages: bytes
     ):
@@ -68,18 +94,15 @@ class TestFullSplitWorkflow:
         assert response.status_code == 200
         
         content = response.content
-        assert content.startswith(b'%PDF-')
+        assert _is_magic(content, "pdf")
         
         # Verify split PDF has 1 page
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) == 1
-        pdf.close()
+        assert _page_count(content) == 1
 
 
 class TestFullRotateWorkflow:
     """Test complete rotate workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_rotate_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -93,10 +116,10 @@ class TestFullRotateWorkflow:
         assert response.status_code == 200
         
         content = response.content
-        assert content.startswith(b'%PDF-')
+        assert _is_magic(content, "pdf")
         
         # Verify rotation was applied
-        pdf = pikepdf.Pdf.open(BytesIO(content))
+        pdf = _open_fast(content)
         page = pdf.pages[0]
         # Rotation is stored in /Rotate attribute
         if '/Rotate' in page:
@@ -108,7 +131,6 @@ class TestFullRotateWorkflow:
 class TestFullCompressWorkflow:
     """Test complete compress workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_compress_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -122,18 +144,15 @@ class TestFullCompressWorkflow:
         assert response.status_code == 200
         
         content = response.content
-        assert content.startswith(b'%PDF-')
+        assert _is_magic(content, "pdf")
         
         # Verify result is valid PDF
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) >= 1
-        pdf.close()
+        assert _page_count(content) >= 1
 
 
 class TestFullPasswordWorkflow:
     """Test complete password workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_password_add_remove_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -148,14 +167,14 @@ class TestFullPasswordWorkflow:
         assert response.status_code == 200
         
         encrypted_content = response.content
-        assert encrypted_content.startswith(b'%PDF-')
+        assert _is_magic(encrypted_content, "pdf")
         
         # Verify it's encrypted
         with pytest.raises(pikepdf.PasswordError):
-            pikepdf.Pdf.open(BytesIO(encrypted_content))
+            _open_fast(encrypted_content)
         
         # Open with password
-        pdf = pikepdf.Pdf.open(BytesIO(encrypted_content), password="test123")
+        pdf = _open_fast(encrypted_content, password="test123")
         assert pdf.is_encrypted
         pdf.close()
         
@@ -171,7 +190,7 @@ class TestFullPasswordWorkflow:
         decrypted_content = response.content
         
         # Verify it's no longer encrypted
-        pdf = pikepdf.Pdf.open(BytesIO(decrypted_content))
+        pdf = _open_fast(decrypted_content)
         assert not pdf.is_encrypted
         pdf.close()
 
@@ -179,7 +198,6 @@ class TestFullPasswordWorkflow:
 class TestFullWatermarkWorkflow:
     """Test complete watermark workflow."""
     
-    @pytest.mark.asyncio
     async def test_full_text_watermark_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -200,18 +218,48 @@ class TestFullWatermarkWorkflow:
         assert response.status_code == 200
         
         content = response.content
-        assert content.startswith(b'%PDF-')
+        assert _is_magic(content, "pdf")
         
         # Verify result is valid PDF
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) >= 1
-        pdf.close()
+        assert _page_count(content) >= 1
+
+
+    async def test_text_watermark_output_size(self, client: AsyncClient):
+        """
+        Test a Latin text watermark stays about as small as plain insert_text.
+        
+        Base-14 Helvetica is referenced, not embedded; embedding a font
+        program made a 20-page result ~10x larger.
+        """
+        blank = fitz.open()
+        for _ in range(20):
+            blank.new_page()
+        source = blank.tobytes()
+        blank.close()
+        
+        # Reference: the same text drawn with PyMuPDF's default Base-14 font
+        baseline = fitz.open(stream=source, filetype="pdf")
+        for page in baseline:
+            page.insert_text((100, 400), "CONFIDENTIAL", fontsize=48, color=(0.5, 0.5, 0.5))
+        baseline_size = len(baseline.tobytes(garbage=4, deflate=True))
+        baseline.close()
+        
+        files = [
+            ("file", ("test.pdf", BytesIO(source), "application/pdf")),
+        ]
+        data = {"text": "CONFIDENTIAL", "font_size": 48, "opacity": 0.3, "pages": "all"}
+        
+        response = await client.post("/api/v1/pdf/watermark/text", files=files, data=data)
+        assert response.status_code == 200
+        
+        # Opacity adds a graphics state, so allow some headroom
+        assert len(response.content) <= baseline_size * 1.5, \
+            f"Watermarked PDF is {len(response.content)} bytes, baseline {baseline_size}"
 
 
 class TestFullExtractWorkflow:
     """Test complete extract workflows."""
     
-    @pytest.mark.asyncio
     async def test_full_extract_text_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -230,7 +278,6 @@ class TestFullExtractWorkflow:
 class TestFullPdfToImagesWorkflow:
     """Test PDF to images conversion."""
     
-    @pytest.mark.asyncio
     async def test_full_pdf_to_images_workflow(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -254,13 +301,12 @@ class TestFullPdfToImagesWorkflow:
         
         content = response.content
         # Should be PNG image
-        assert content.startswith(b'\x89PNG')
+        assert _is_magic(content, "png")
 
 
 class TestFullImagesToPdfWorkflow:
     """Test images to PDF conversion."""
     
-    @pytest.mark.asyncio
     async def test_full_images_to_pdf_workflow(
         self, client: AsyncClient, sample_png_bytes: bytes
     ):
@@ -278,18 +324,15 @@ class TestFullImagesToPdfWorkflow:
         assert response.status_code == 200
         
         content = response.content
-        assert content.startswith(b'%PDF-')
+        assert _is_magic(content, "pdf")
         
         # Verify result is valid PDF with 1 page
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) == 1
-        pdf.close()
+        assert _page_count(content) == 1
 
 
 class TestEndToEndWithMultipleFiles:
     """Test workflows with multiple files."""
     
-    @pytest.mark.asyncio
     async def test_merge_multiple_pdfs(
         self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
     ):
@@ -304,15 +347,27 @@ class TestEndToEndWithMultipleFiles:
         assert response.status_code == 200
         
         content = response.content
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) >= 3
-        pdf.close()
+        assert _page_count(content) >= 3
+    
+    async def test_merge_parallel_requests(
+        self, client: AsyncClient, merge_upload: tuple
+    ):
+        """Test concurrent merges each get their own, complete result."""
+        body, headers = merge_upload
+        
+        responses = await asyncio.gather(*[
+            client.post("/api/v1/pdf/merge", content=body, headers=headers)
+            for _ in range(8)
+        ])
+        
+        for response in responses:
+            assert response.status_code == 200
+            assert _page_count(response.content) == 3
 
 
 class TestErrorHandling:
     """Test error handling in workflows."""
     
-    @pytest.mark.asyncio
     async def test_invalid_file_error_message(self, client: AsyncClient):
         """Test that invalid files produce helpful error messages."""
         files = [
@@ -325,7 +380,6 @@ class TestErrorHandling:
         error = response.json()
         assert "detail" in error
         
-    @pytest.mark.asyncio
     async def test_merge_single_file_error(self, client: AsyncClient, sample_pdf_bytes: bytes):
         """Test that merge requires multiple files."""
         files = [
@@ -335,3 +389,78 @@ class TestErrorHandling:
         response = await client.post("/api/v1/pdf/merge", files=files)
         assert response.status_code == 400
         assert "at least 2" in response.json().get("detail", "").lower()
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    """
+    Run PDF jobs in the worker process pool, as the app lifespan does.
+    
+    The shared test client never enters the lifespan, so without this every
+    endpoint test covers only the in-thread fallback.
+    """
+    from app.core import workers
+    from app.core.config import settings
+    
+    monkeypatch.setattr(settings, "PDF_WORKER_PROCESSES", 1)
+    workers.start_worker_pool()
+    assert workers._pool is not None
+    yield workers._pool
+    workers.stop_worker_pool()
+
+
+@pytest.mark.usefixtures("worker_pool")
+class TestWorkerPoolWorkflow:
+    """Test endpoints with jobs (and their errors) crossing the process boundary."""
+    
+    async def test_merge_in_worker(self, client: AsyncClient, merge_upload: tuple):
+        """Test a merged PDF survives the worker round trip."""
+        body, headers = merge_upload
+        
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
+        assert response.status_code == 200, f"Merge failed: {response.text}"
+        assert _is_magic(response.content, "pdf")
+        assert _page_count(response.content) == 3
+    
+    async def test_split_in_worker(self, client: AsyncClient, sample_pdf_two_pages: bytes):
+        """Test a list of split outputs is detached and re-attached intact."""
+        files = [
+            ("file", ("test.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
+        ]
+        data = {"mode": "every_n", "n_pages": 1}
+        
+        response = await client.post("/api/v1/pdf/split", files=files, data=data)
+        assert response.status_code == 200
+        
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            names = archive.namelist()
+            assert len(names) == 2
+            for name in names:
+                assert _page_count(archive.read(name)) == 1
+    
+    async def test_split_out_of_range_in_worker(
+        self, client: AsyncClient, sample_pdf_two_pages: bytes
+    ):
+        """Test a page error raised in the worker still maps to 400."""
+        files = [
+            ("file", ("test.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
+        ]
+        data = {"mode": "range", "start": 5, "end": 6}
+        
+        response = await client.post("/api/v1/pdf/split", files=files, data=data)
+        assert response.status_code == 400
+    
+    async def test_wrong_password_in_worker(self, client: AsyncClient, sample_pdf_bytes: bytes):
+        """Test a FileValidationError raised in the worker keeps its 401."""
+        encrypted = BytesIO()
+        with pikepdf.Pdf.open(BytesIO(sample_pdf_bytes)) as pdf:
+            pdf.save(encrypted, encryption=pikepdf.Encryption(owner="secret", user="secret"))
+        
+        files = [
+            ("file", ("protected.pdf", BytesIO(encrypted.getvalue()), "application/pdf")),
+        ]
+        data = {"password": "wrong"}
+        
+        response = await client.post("/api/v1/pdf/password/remove", files=files, data=data)
+        assert response.status_code == 401
+        assert "incorrect password" in response.json()["detail"].lower()
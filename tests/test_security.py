@@ -6,14 +6,19 @@ These tests verify security requirements:
 - No sensitive data in logs (ARCH-04)
 - File size limits enforced (ARCH-06)
 - Request timeout (ARCH-07)
+- URL-to-PDF refuses internal hosts (SSRF)
 
 Reference: PITFALLS.md - Browser Caching of Sensitive Downloads, Logging User Data
 """
+import ast
+import functools
+import inspect
 import io
 import logging
+import textwrap
 import tempfile
+from collections.abc import AsyncIterator, Iterable, Iterator
 from io import BytesIO
-from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 import pytest
@@ -21,11 +26,108 @@ from httpx import AsyncClient
 
 from app.core.config import settings
 
+# Fixed boundary for hand-encoded multipart bodies, and the size of the
+# pieces they're streamed in
+MULTIPART_BOUNDARY = "notracepdf-test-boundary"
+MULTIPART_CHUNK_SIZE = 1024 * 1024
+
+
+@functools.cache
+def _middleware_audit() -> dict:
+    """Which parts of the request PrivacyLoggingMiddleware.dispatch reads, parsed once."""
+    from app.middleware.privacy_logging import PrivacyLoggingMiddleware
+    
+    source = textwrap.dedent(inspect.getsource(PrivacyLoggingMiddleware.dispatch))
+    request_attrs = {
+        node.attr
+        for node in ast.walk(ast.parse(source))
+        if isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "request"
+    }
+    
+    return {
+        "logs_method": "method" in request_attrs,
+        "logs_path": "url" in request_attrs,
+        "logs_body": bool(request_attrs & {"body", "json", "form", "stream"}),
+        "logs_client": "client" in request_attrs,
+    }
+
+
+def _x_stream(total: int) -> Iterator[bytes]:
+    """Yield total bytes of b"X" in MULTIPART_CHUNK_SIZE pieces, reusing one buffer."""
+    buf = b"X" * MULTIPART_CHUNK_SIZE
+    sent = 0
+    while sent < total:
+        n = min(MULTIPART_CHUNK_SIZE, total - sent)
+        yield buf if n == MULTIPART_CHUNK_SIZE else buf[:n]
+        sent += n
+
+
+def _encode_multipart(
+    field: str, filename: str, media_type: str, chunks: Iterable[bytes], size: int
+) -> tuple[AsyncIterator[bytes], dict]:
+    """
+    Encode a single-file multipart body around a stream of content chunks.
+    
+    httpx re-encodes multipart files in small reads, and each read reaches
+    the app as its own ASGI message; for a 100MB+ payload that's thousands
+    of trips through the middleware stack. Here the part head and tail are
+    encoded once and the content passes through as it's produced, so the
+    payload never has to exist in full.
+    
+    Args:
+        field: Form field name
+        filename: Filename sent for the part
+        media_type: Content type of the part
+        chunks: Part content, in pieces
+        size: Total length of the part content
+        
+    Returns:
+        Tuple of (async body iterator, request headers)
+    """
+    head = (
+        f"--{MULTIPART_BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {media_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{MULTIPART_BOUNDARY}--\r\n".encode()
+    
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        for chunk in chunks:
+            yield chunk
+        yield tail
+    
+    headers = {
+        "content-type": f"multipart/form-data; boundary={MULTIPART_BOUNDARY}",
+        "content-length": str(len(head) + size + len(tail)),
+    }
+    return body(), headers
+
+
+class HeaderProbe:
+    """Response headers with names and values lowercased once, for token checks."""
+    
+    def __init__(self, response):
+        self._headers = {k.lower(): v.lower() for k, v in response.headers.items()}
+    
+    def get(self, name: str) -> str:
+        """Lowercased value of a header, or "" if it's missing."""
+        return self._headers.get(name, "")
+    
+    def has(self, name: str) -> bool:
+        """Whether the header is present."""
+        return name in self._headers
+    
+    def contains(self, name: str, token: str) -> bool:
+        """Whether the header's value contains token (lowercase)."""
+        return token in self._headers.get(name, "")
+
 
 class TestCacheHeaders:
     """Test cache headers are set on all responses."""
     
-    @pytest.mark.asyncio
     async def test_cache_headers_on_health(self, client: AsyncClient):
         """
         Verify cache headers on health endpoint.
@@ -36,75 +138,62 @@ class TestCacheHeaders:
         assert response.status_code == 200
         
         # Check required cache headers
-        assert "cache-control" in response.headers
-        cache_control = response.headers["cache-control"].lower()
+        probe = HeaderProbe(response)
+        assert probe.has("cache-control")
+        cache_control = probe.get("cache-control")
         
         # Must contain no-store and no-cache
-        assert "no-store" in cache_control, \
-            f"Cache-Control should contain 'no-store', got: {cache_control}"
-        assert "no-cache" in cache_control, \
-            f"Cache-Control should contain 'no-cache', got: {cache_control}"
-        assert "must-revalidate" in cache_control, \
-            f"Cache-Control should contain 'must-revalidate', got: {cache_control}"
-        assert "private" in cache_control, \
-            f"Cache-Control should contain 'private', got: {cache_control}"
+        for token in ("no-store", "no-cache", "must-revalidate", "private"):
+            assert probe.contains("cache-control", token), \
+                f"Cache-Control should contain '{token}', got: {cache_control}"
             
-    @pytest.mark.asyncio
     async def test_cache_headers_on_test_endpoint(self, client: AsyncClient):
         """Verify cache headers on test endpoint."""
         response = await client.get("/test-cache")
         assert response.status_code == 200
         
-        cache_control = response.headers.get("cache-control", "")
-        assert "no-store" in cache_control.lower()
+        assert HeaderProbe(response).contains("cache-control", "no-store")
         
-    @pytest.mark.asyncio
     async def test_cache_headers_on_download(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+        self, client: AsyncClient, merge_upload: tuple
     ):
         """
         Verify cache headers on PDF download.
         
         Reference: ARCH-05
         """
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        body, headers = merge_upload
         
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
         assert response.status_code == 200
         
         # Verify cache headers on download response
-        cache_control = response.headers.get("cache-control", "")
-        assert "no-store" in cache_control.lower(), \
-            f"Download response should have no-store, got: {cache_control}"
+        probe = HeaderProbe(response)
+        assert probe.contains("cache-control", "no-store"), \
+            f"Download response should have no-store, got: {probe.get('cache-control')}"
             
-    @pytest.mark.asyncio
     async def test_pragma_header(self, client: AsyncClient):
         """Verify Pragma: no-cache header."""
         response = await client.get("/health")
         
-        pragma = response.headers.get("pragma", "").lower()
-        assert "no-cache" in pragma, \
-            f"Pragma should be 'no-cache', got: {pragma}"
+        probe = HeaderProbe(response)
+        assert probe.contains("pragma", "no-cache"), \
+            f"Pragma should be 'no-cache', got: {probe.get('pragma')}"
             
-    @pytest.mark.asyncio
     async def test_expires_header(self, client: AsyncClient):
         """Verify Expires: 0 header."""
         response = await client.get("/health")
         
-        expires = response.headers.get("expires", "")
+        expires = HeaderProbe(response).get("expires")
         assert expires == "0", f"Expires should be '0', got: {expires}"
         
-    @pytest.mark.asyncio
     async def test_x_content_type_options(self, client: AsyncClient):
         """Verify X-Content-Type-Options: nosniff header."""
         response = await client.get("/health")
         
-        x_content_type = response.headers.get("x-content-type-options", "").lower()
-        assert "nosniff" in x_content_type, \
-            f"X-Content-Type-Options should be 'nosniff', got: {x_content_type}"
+        probe = HeaderProbe(response)
+        assert probe.contains("x-content-type-options", "nosniff"), \
+            f"X-Content-Type-Options should be 'nosniff', got: {probe.get('x-content-type-options')}"
 
 
 class TestNoSensitiveDataInLogs:
@@ -121,25 +210,16 @@ class TestNoSensitiveDataInLogs:
         
         Reference: ARCH-04
         """
-        from app.middleware.privacy_logging import PrivacyLoggingMiddleware
-        import inspect
-        
-        source = inspect.getsource(PrivacyLoggingMiddleware.dispatch)
+        audit = _middleware_audit()
         
         # Verify the middleware logs method and path
-        assert "method" in source.lower() or "request.method" in source, \
-            "Should log HTTP method"
-        assert "path" in source.lower() or "request.url.path" in source, \
-            "Should log request path"
+        assert audit["logs_method"], "Should log HTTP method"
+        assert audit["logs_path"], "Should log request path"
             
         # Verify it does NOT log request body or other sensitive data
-        # The source should NOT have body logging
-        assert "request.body()" not in source, \
-            "Should NOT log request body"
-        assert "client.host" not in source and "client" not in source.split("request.")[0] if "request." in source else True, \
-            "Should NOT log client IP"
+        assert not audit["logs_body"], "Should NOT log request body"
+        assert not audit["logs_client"], "Should NOT log client IP"
             
-    @pytest.mark.asyncio
     async def test_filename_not_in_response_headers(
         self, client: AsyncClient, sample_pdf_bytes: bytes
     ):
@@ -165,7 +245,6 @@ class TestNoSensitiveDataInLogs:
 class TestFileSizeLimits:
     """Test file size limits are enforced."""
     
-    @pytest.mark.asyncio
     async def test_file_size_limit_enforced(self, client: AsyncClient):
         """
         Verify file size limit is enforced.
@@ -173,22 +252,20 @@ class TestFileSizeLimits:
         Reference: ARCH-06
         """
         # Create a file larger than MAX_FILE_SIZE_MB
-        # Default is 100MB, so create a 101MB file
+        # Default is 100MB, so send a 101MB file, generated as it's uploaded
         large_size = (settings.MAX_FILE_SIZE_MB + 1) * 1024 * 1024
-        large_content = b"X" * large_size
-        
-        files = [
-            ("files", ("large.pdf", BytesIO(large_content), "application/pdf")),
-        ]
-        
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        body, headers = _encode_multipart(
+            "files", "large.pdf", "application/pdf", _x_stream(large_size), large_size
+        )
+        response = await client.post(
+            "/api/v1/pdf/merge", content=body, headers=headers
+        )
         
         # Should reject with 413 Request Entity Too Large or 400 Bad Request
         # (400 if validation catches it before size check)
         assert response.status_code in [400, 413], \
             f"Should reject large file with 400 or 413, got: {response.status_code}"
             
-    @pytest.mark.asyncio
     async def test_empty_file_rejected(self, client: AsyncClient):
         """Verify empty files are rejected."""
         files = [
@@ -200,17 +277,13 @@ class TestFileSizeLimits:
         assert response.status_code == 400, \
             f"Should reject empty file with 400, got: {response.status_code}"
             
-    @pytest.mark.asyncio
     async def test_normal_size_accepted(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+        self, client: AsyncClient, merge_upload: tuple
     ):
         """Verify normal-sized files are accepted."""
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        body, headers = merge_upload
         
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
         
         assert response.status_code == 200, \
             f"Normal files should be accepted, got: {response.status_code}"
@@ -232,37 +305,110 @@ class TestRequestTimeout:
         assert 10 <= settings.REQUEST_TIMEOUT_SECONDS <= 300, \
             f"Timeout should be between 10-300s, got: {settings.REQUEST_TIMEOUT_SECONDS}"
             
-    def test_dockerfile_timeout_configured(self):
+    def test_dockerfile_timeout_configured(self, dockerfile_text):
         """Verify Gunicorn timeout is set in Dockerfile."""
-        dockerfile_path = Path("/home/ubuntu/projects/NoTracePDF/Dockerfile")
-        if dockerfile_path.exists():
-            content = dockerfile_path.read_text()
-            assert "--timeout" in content, \
-                "Dockerfile should have Gunicorn timeout configured"
+        if dockerfile_text is None:
+            pytest.skip("Dockerfile not available")
+        assert "--timeout" in dockerfile_text, \
+            "Dockerfile should have Gunicorn timeout configured"
 
 
 class TestMemoryLimits:
     """Test memory limits configuration."""
     
-    def test_docker_memory_limit(self):
+    def test_docker_memory_limit(self, compose_text):
         """Verify Docker memory limit is configured."""
-        compose_path = Path("/home/ubuntu/projects/NoTracePDF/docker-compose.yml")
-        if compose_path.exists():
-            content = compose_path.read_text()
-            assert "memory:" in content.lower(), \
-                "docker-compose.yml should have memory limit configured"
-            assert "1G" in content or "1g" in content.lower() or "1024M" in content, \
-                "Memory limit should be set (expected 1G)"
+        if compose_text is None:
+            pytest.skip("docker-compose.yml not available")
+        assert "memory:" in compose_text.lower(), \
+            "docker-compose.yml should have memory limit configured"
+        assert "1G" in compose_text or "1g" in compose_text.lower() or "1024M" in compose_text, \
+            "Memory limit should be set (expected 1G)"
                 
-    def test_memory_limit_prevents_oom(self):
+    def test_memory_limit_prevents_oom(self, compose_text):
         """
         Verify memory limit would prevent host OOM.
         
         Reference: ARCH-06
         """
-        compose_path = Path("/home/ubuntu/projects/NoTracePDF/docker-compose.yml")
-        if compose_path.exists():
-            content = compose_path.read_text()
-            # Verify limits section exists
-            assert "limits:" in content, \
-                "docker-compose.yml should have resource limits"
+        if compose_text is None:
+            pytest.skip("docker-compose.yml not available")
+        # Verify limits section exists
+        assert "limits:" in compose_text, \
+            "docker-compose.yml should have resource limits"
+
+
+class TestUrlSafety:
+    """Test SSRF filtering of URL-to-PDF targets."""
+    
+    @pytest.mark.parametrize("url", [
+        "http://localhost/",
+        "http://localhost./",
+        "http://127.0.0.1./",
+        "http://10.0.0.1/",
+        "http://[::1]/",
+        "http://printer.local/",
+        "http://app.internal/",
+        "http://intranet.example.com/",
+        "ftp://example.com/",
+    ])
+    def test_internal_urls_blocked(self, url):
+        """Verify loopback, private and internal-looking hosts are refused."""
+        from app.services.web_conversion_service import _is_safe_url
+        assert not _is_safe_url(url)
+    
+    @pytest.mark.parametrize("url", [
+        "https://example.com/",
+        "http://my-locally-owned.com/",
+        "https://internals.dev/",
+    ])
+    def test_public_urls_allowed(self, url):
+        """Verify public hosts merely containing 'local'/'internal' pass."""
+        from app.services.web_conversion_service import _is_safe_url
+        assert _is_safe_url(url)
+    
+    @pytest.mark.parametrize("url", [
+        "HTTP://169.254.169.254/latest/meta-data/",
+        "Https://10.0.0.1/style.css",
+        "file:///etc/passwd",
+        "ftp://example.com/logo.png",
+    ])
+    def test_resource_fetcher_blocks_unsafe_urls(self, url):
+        """Verify subresources fail closed whatever the scheme's case."""
+        from app.services.web_conversion_service import _url_fetcher
+        with pytest.raises(ValueError):
+            _url_fetcher(url)
+    
+    def test_resource_fetcher_allows_data_uris(self):
+        """Verify inline data: URIs still load without network access."""
+        from app.services import web_conversion_service
+        with patch.object(web_conversion_service, "default_url_fetcher") as fetcher:
+            web_conversion_service._url_fetcher("DATA:text/plain,hello")
+        fetcher.assert_called_once_with("DATA:text/plain,hello")
+    
+    async def test_redirect_to_private_url_blocked(self, monkeypatch):
+        """Verify a public URL redirecting to an internal host is not followed."""
+        import httpx
+        from app.services.web_conversion_service import _new_http_client, url_to_pdf
+        
+        monkeypatch.setattr(settings, "URL_CACHE_ENABLED", False)
+        requested = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.host)
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/"})
+        
+        pooled = _new_http_client()
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler),
+            follow_redirects=pooled.follow_redirects,
+            event_hooks=pooled.event_hooks,
+        )
+        try:
+            with pytest.raises(ValueError):
+                await url_to_pdf("https://example.com/", client=client)
+        finally:
+            await client.aclose()
+            await pooled.aclose()
+        
+        assert requested == ["example.com"]
@@ -9,9 +9,15 @@ These tests verify the core privacy guarantees:
 
 Reference: PITFALLS.md - Temporary File Leakage, Docker Volume Persistence
 """
+import gc
+import json
 import os
+import re
+import shutil
 import subprocess
 import tempfile
+import time
+import warnings
 from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -19,128 +25,192 @@ from unittest.mock import patch, MagicMock
 import pytest
 from httpx import AsyncClient
 
-import pikepdf
+from app.core.config import settings
+from app.utils import get_page_count
 
+# Whether the tests are running inside the Docker container
+IN_DOCKER = os.path.exists("/.dockerenv")
 
+# Uploads that aren't PDFs, shared by the error-path tests
+INVALID_PDF_BYTES = b"not a pdf"
+JUNK_BYTES = b"X" * 1000
+
+# Rejections for a non-PDF upload: bad request or unsupported media type
+BAD_UPLOAD_STATUSES = frozenset({400, 415})
+
+# A VOLUME instruction at the start of any Dockerfile line, in any case
+VOLUME_RE = re.compile(r"^\s*VOLUME", re.IGNORECASE | re.MULTILINE)
+
+
+@pytest.fixture
+def isolated_tmp(monkeypatch, tmp_path_factory) -> Path:
+    """
+    Point every temp location the app writes to at an empty per-test directory.
+    
+    Checking the shared system temp dir means scanning whatever else lives
+    there, and can't tell our files from anyone else's. The directory comes
+    from the session's pytest temp root under a short numbered name
+    (zt0, zt1, ...), and monkeypatch restores the previous locations.
+    Under pytest-xdist each worker has its own temp root, so these tests
+    can run in parallel without seeing each other's files.
+    """
+    scratch = tmp_path_factory.mktemp("zt")
+    monkeypatch.setenv("TMPDIR", str(scratch))
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    monkeypatch.setattr(settings, "SPOOL_DIR", str(scratch))
+    return scratch
+
+
+@pytest.fixture(scope="session")
+def container_mounts() -> list:
+    """
+    Mounts of the container the tests run in, looked up once per session.
+    
+    Uses the Docker SDK when it's installed (one request over the Docker
+    socket) and the docker CLI otherwise; skips if neither can reach Docker.
+    """
+    name = os.environ.get("HOSTNAME", "notracepdf")
+    
+    try:
+        import docker
+    except ImportError:
+        docker = None
+    
+    if docker is not None:
+        try:
+            docker_client = docker.from_env()
+            try:
+                return docker_client.containers.get(name).attrs["Mounts"]
+            finally:
+                docker_client.close()
+        except docker.errors.DockerException as e:
+            pytest.skip(f"Docker not reachable: {e}")
+    
+    if shutil.which("docker") is None:
+        pytest.skip("Neither the Docker SDK nor the docker CLI is available")
+    # json.loads takes the raw bytes, so the output isn't decoded to str first
+    result = subprocess.run(
+        ["docker", "inspect", name, "--format", "{{json .Mounts}}"],
+        capture_output=True
+    )
+    if result.returncode != 0:
+        pytest.skip(f"docker inspect failed: {result.stderr.decode(errors='replace').strip()}")
+    return json.loads(result.stdout)
+
+
+# Stand-in for unoconv: the listener keeps a child running (as soffice
+# would) and records its pid; conversions hang
+FAKE_UNOCONV = """#!/bin/sh
+case "$*" in
+  *--listener*) sleep 300 & echo $! > "{pid_file}"; wait ;;
+  *--no-launch*) exec sleep 300 ;;
+esac
+"""
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process exists and isn't a zombie waiting to be reaped."""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def _leftovers(directory: Path) -> list:
+    """Names of entries left in directory (os.scandir, no per-entry stat)."""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries]
+
+
+def _upload_bytes(request, upload) -> bytes:
+    """Content for an upload given as raw bytes or a sample fixture's name."""
+    if isinstance(upload, bytes):
+        return upload
+    return request.getfixturevalue(upload)
+
+
+# (endpoint, form field, uploads, form data, accepted status codes)
+PERSISTENCE_CASES = [
+    pytest.param(
+        "/api/v1/pdf/merge", "files", ("sample_pdf_bytes", "sample_pdf_two_pages"),
+        None, frozenset({200}), id="merge",
+    ),
+    pytest.param(
+        "/api/v1/pdf/split", "file", ("sample_pdf_two_pages",),
+        {"mode": "range", "start": 1, "end": 1}, frozenset({200}), id="split",
+    ),
+    pytest.param(
+        "/api/v1/pdf/password/add", "file", ("sample_pdf_bytes",),
+        {"password": "test123"}, frozenset({200}), id="password",
+    ),
+    pytest.param(
+        "/api/v1/pdf/merge", "files", (INVALID_PDF_BYTES,),
+        None, BAD_UPLOAD_STATUSES, id="error",
+    ),
+]
+
+
+@pytest.mark.usefixtures("isolated_tmp")
 class TestNoFilePersistence:
     """Test that no files persist after PDF operations."""
     
-    @pytest.mark.asyncio
-    async def test_no_file_persistence_after_merge(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+    @pytest.mark.parametrize("endpoint,field,uploads,data,expected", PERSISTENCE_CASES)
+    async def test_no_file_persistence(
+        self, request, client: AsyncClient, isolated_tmp: Path,
+        endpoint: str, field: str, uploads: tuple, data, expected: frozenset
     ):
         """
-        Verify no files persist after merge operation.
-        
-        Reference: ARCH-01, ARCH-02
-        """
-        # Create upload files
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        Verify no files persist after an operation, whether it succeeds or fails.
         
-        # Track temp directory before operation
-        temp_dir = Path(tempfile.gettempdir())
-        files_before = set(temp_dir.glob("*"))
-        
-        # Perform merge
-        response = await client.post("/api/v1/pdf/merge", files=files)
-        assert response.status_code == 200
-        
-        # Track temp directory after operation
-        files_after = set(temp_dir.glob("*"))
-        
-        # Verify no new persistent files created
-        # Note: Some temp files may be created during processing but should be cleaned up
-        # This is a basic check - in a containerized environment, tmpfs ensures this
-        
-    @pytest.mark.asyncio
-    async def test_no_file_persistence_after_error(
-        self, client: AsyncClient
-    ):
-        """
-        Verify cleanup happens even on error.
-        
-        Reference: ARCH-08
+        Reference: ARCH-01, ARCH-02, ARCH-08
         """
-        # Upload invalid file (not a PDF)
         files = [
-            ("files", ("invalid.pdf", BytesIO(b"not a pdf"), "application/pdf")),
+            (field, (f"test{i}.pdf", BytesIO(_upload_bytes(request, upload)), "application/pdf"))
+            for i, upload in enumerate(uploads, 1)
         ]
         
-        # Perform merge - should fail
-        response = await client.post("/api/v1/pdf/merge", files=files)
-        assert response.status_code in [400, 415]  # Bad request or unsupported media type
+        # Only the signature is checked, so read the first chunk and stop
+        async with client.stream("POST", endpoint, files=files, data=data) as response:
+            assert response.status_code in expected
+            
+            # Successful responses should be valid PDFs
+            if response.status_code == 200:
+                head = await anext(response.aiter_bytes())
+                assert head.startswith(b'%PDF-')
         
-        # Verify temp directory is clean
-        temp_dir = Path(tempfile.gettempdir())
-        # In a real containerized environment, tmpfs ensures no persistence
+        # Verify no persistent files created
+        # Note: Temp files are created during processing (open_pdf maps a
+        # named copy of each input) but must be gone once the response is sent
+        leftovers = _leftovers(isolated_tmp)
+        assert not leftovers, f"Temp files left after {endpoint}: {leftovers}"
         
-    @pytest.mark.asyncio
     async def test_in_memory_processing_merge(
-        self, client: AsyncClient, sample_pdf_bytes: bytes, sample_pdf_two_pages: bytes
+        self, client: AsyncClient, merge_upload: tuple
     ):
         """
         Verify merge operation uses in-memory processing.
         
         Reference: ARCH-01
         """
-        files = [
-            ("files", ("test1.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-            ("files", ("test2.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
+        body, headers = merge_upload
         
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        response = await client.post("/api/v1/pdf/merge", content=body, headers=headers)
         assert response.status_code == 200
         
         # Verify response is a valid PDF
         content = response.content
         assert content.startswith(b'%PDF-')
         
-        # Verify the merged PDF can be opened
-        pdf = pikepdf.Pdf.open(BytesIO(content))
-        assert len(pdf.pages) >= 2
-        pdf.close()
-        
-    @pytest.mark.asyncio
-    async def test_no_file_persistence_split(
-        self, client: AsyncClient, sample_pdf_two_pages: bytes
-    ):
-        """Verify no files persist after split operation."""
-        files = [
-            ("file", ("test.pdf", BytesIO(sample_pdf_two_pages), "application/pdf")),
-        ]
-        data = {"mode": "range", "start": 1, "end": 1}
-        
-        response = await client.post("/api/v1/pdf/split", files=files, data=data)
-        assert response.status_code == 200
-        
-        # Response should be a valid PDF
-        content = response.content
-        assert content.startswith(b'%PDF-')
-        
-    @pytest.mark.asyncio
-    async def test_no_file_persistence_password(
-        self, client: AsyncClient, sample_pdf_bytes: bytes
-    ):
-        """Verify no files persist after password operation."""
-        files = [
-            ("file", ("test.pdf", BytesIO(sample_pdf_bytes), "application/pdf")),
-        ]
-        data = {"password": "test123"}
-        
-        response = await client.post("/api/v1/pdf/password/add", files=files, data=data)
-        assert response.status_code == 200
-        
-        content = response.content
-        assert content.startswith(b'%PDF-')
+        # Verify the merged PDF can be opened; merge writes object streams,
+        # so page dictionaries can't be counted by scanning the raw bytes
+        assert get_page_count(BytesIO(content)) >= 2
 
 
 class TestTmpfsConfiguration:
     """Test that tmpfs mounts are properly configured."""
     
-    def test_tmpfs_is_ram_backed(self):
+    def test_tmpfs_is_ram_backed(self, compose_text):
         """
         Verify that /tmp is tmpfs (RAM-backed) in container.
         
@@ -153,72 +223,53 @@ class TestTmpfsConfiguration:
         # This test documents the expected configuration
         
         # Check if docker-compose.yml has tmpfs configuration
-        compose_path = Path("/home/ubuntu/projects/NoTracePDF/docker-compose.yml")
-        if compose_path.exists():
-            content = compose_path.read_text()
-            assert "tmpfs:" in content, "docker-compose.yml should have tmpfs configuration"
-            assert "/tmp" in content, "docker-compose.yml should mount /tmp as tmpfs"
+        if compose_text is None:
+            pytest.skip("docker-compose.yml not available")
+        assert "tmpfs:" in compose_text, "docker-compose.yml should have tmpfs configuration"
+        assert "/tmp" in compose_text, "docker-compose.yml should mount /tmp as tmpfs"
             
-    def test_uploads_is_tmpfs(self):
+    def test_uploads_is_tmpfs(self, compose_text):
         """
         Verify that /app/uploads is tmpfs in container.
         
         Reference: ARCH-03
         """
-        compose_path = Path("/home/ubuntu/projects/NoTracePDF/docker-compose.yml")
-        if compose_path.exists():
-            content = compose_path.read_text()
-            assert "/app/uploads" in content, "docker-compose.yml should mount /app/uploads as tmpfs"
+        if compose_text is None:
+            pytest.skip("docker-compose.yml not available")
+        assert "/app/uploads" in compose_text, "docker-compose.yml should mount /app/uploads as tmpfs"
 
 
 class TestContainerNoVolumes:
     """Test that container has no persistent volumes."""
     
-    @pytest.mark.skipif(
-        not os.path.exists("/.dockerenv"),
-        reason="Only runs inside Docker container"
-    )
-    def test_container_no_volumes(self):
+    @pytest.mark.skipif(not IN_DOCKER, reason="Only runs inside Docker container")
+    def test_container_no_volumes(self, container_mounts: list):
         """
         Verify container has no persistent volume mounts.
         
         Reference: ARCH-02
         """
-        result = subprocess.run(
-            ["docker", "inspect", os.environ.get("HOSTNAME", "notracepdf"), 
-             "--format", "{{json .Mounts}}"],
-            capture_output=True,
-            text=True
-        )
+        # Filter out tmpfs mounts (which are ephemeral)
+        persistent_mounts = [
+            m for m in container_mounts
+            if m.get("Type") not in ("tmpfs",)
+        ]
         
-        if result.returncode == 0:
-            import json
-            mounts = json.loads(result.stdout)
-            
-            # Filter out tmpfs mounts (which are ephemeral)
-            persistent_mounts = [
-                m for m in mounts 
-                if m.get("Type") not in ("tmpfs",)
-            ]
-            
-            assert len(persistent_mounts) == 0, \
-                f"Found persistent volumes: {persistent_mounts}"
+        assert len(persistent_mounts) == 0, \
+            f"Found persistent volumes: {persistent_mounts}"
                 
-    def test_dockerfile_no_volume_instruction(self):
+    def test_dockerfile_no_volume_instruction(self, dockerfile_text):
         """
         Verify Dockerfile has no VOLUME instruction.
         
         Reference: ARCH-02
         """
-        dockerfile_path = Path("/home/ubuntu/projects/NoTracePDF/Dockerfile")
-        if dockerfile_path.exists():
-            content = dockerfile_path.read_text()
-            # Check for VOLUME instruction (case insensitive)
-            lines = content.split("\n")
-            for line in lines:
-                stripped = line.strip().upper()
-                assert not stripped.startswith("VOLUME"), \
-                    "Dockerfile should NOT have VOLUME instruction"
+        if dockerfile_text is None:
+            pytest.skip("Dockerfile not available")
+        # Check for VOLUME instruction (case insensitive)
+        match = VOLUME_RE.search(dockerfile_text)
+        assert match is None, \
+            f"Dockerfile should NOT have VOLUME instruction, found: {match and match.group().strip()}"
 
 
 class TestCleanupHandlers:
@@ -230,7 +281,53 @@ class TestCleanupHandlers:
         assert callable(register_cleanup_handlers), \
             "register_cleanup_handlers should be a callable"
             
-    @pytest.mark.asyncio
+    def test_hung_office_listener_restart_leaves_no_children(self, monkeypatch, tmp_path: Path):
+        """
+        Verify replacing a hung LibreOffice listener also stops what it started.
+        
+        Reference: ARCH-08
+        """
+        from app.services import text_conversion_service as tcs
+        
+        pid_file = tmp_path / "child.pid"
+        unoconv = tmp_path / "unoconv"
+        unoconv.write_text(FAKE_UNOCONV.format(pid_file=pid_file))
+        unoconv.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        monkeypatch.setattr(tcs, "LIBREOFFICE_TIMEOUT", 0.5)
+        monkeypatch.setattr(tcs, "LISTENER_STOP_TIMEOUT", 2)
+        
+        def wait_for_child() -> int:
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if pid_file.exists() and pid_file.read_text().strip():
+                    return int(pid_file.read_text())
+                time.sleep(0.02)
+            pytest.fail("Fake listener never started its child")
+        
+        tcs.start_office_listener()
+        try:
+            old_listener = tcs._office_listener
+            old_profile = tcs._office_profile
+            old_child = wait_for_child()
+            pid_file.unlink()
+            
+            # The conversion hangs: falls back, and the listener is replaced
+            assert tcs._convert_with_listener(b"{\\rtf1 test}") is None
+            
+            assert old_listener.poll() is not None, "Hung listener still running"
+            assert not _pid_alive(old_child), "Listener's child survived the restart"
+            assert not os.path.exists(old_profile), "Listener profile left behind"
+            
+            assert tcs._office_listener is not old_listener
+            assert tcs._office_listener.poll() is None
+            assert tcs._office_profile != old_profile
+            new_child = wait_for_child()
+        finally:
+            tcs.stop_office_listener()
+        
+        assert not _pid_alive(new_child), "Listener's child survived shutdown"
+        
     async def test_cleanup_on_invalid_file(self, client: AsyncClient):
         """
         Verify cleanup happens when processing invalid files.
@@ -239,11 +336,18 @@ class TestCleanupHandlers:
         """
         # Upload completely invalid content
         files = [
-            ("files", ("test.pdf", BytesIO(b"X" * 1000), "application/pdf")),
+            ("files", ("test.pdf", BytesIO(JUNK_BYTES), "application/pdf")),
         ]
         
-        response = await client.post("/api/v1/pdf/merge", files=files)
+        # Files left open on the error path only surface as a ResourceWarning
+        # when collected, so collect here rather than in some later test
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            response = await client.post("/api/v1/pdf/merge", files=files)
+            gc.collect()
+        
         # Should fail with appropriate error
         assert response.status_code >= 400
         
-        # If we get here without hanging or crashing, cleanup handled properly
+        leaked = [str(w.message) for w in caught if issubclass(w.category, ResourceWarning)]
+        assert not leaked, f"Resources left open on the error path: {leaked}"